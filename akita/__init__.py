@@ -1,9 +1,19 @@
+__version__ = '0.1.0'
+
 from . import tokenizer
 from . import parser
+from . import infer
+from . import optimize
 from . import compiler
+from . import cache
+from . import build
 
 __all__ = [
     tokenizer,
     parser,
-    compiler
-]
\ No newline at end of file
+    infer,
+    optimize,
+    compiler,
+    cache,
+    build
+]
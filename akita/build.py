@@ -0,0 +1,198 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from hashlib import sha256
+from tempfile import TemporaryDirectory
+from copy import deepcopy
+from glob import glob
+import subprocess
+import shutil
+import os
+
+from . import cache
+from . import compiler
+
+CC = 'clang'
+CFLAGS = []
+PROFDATA = 'llvm-profdata'
+
+def build_key(filename: str, modules: list[str], command: list[str]) -> str:
+    digest = sha256(cache.fingerprint())
+    base = os.path.dirname(filename)
+
+    for module in modules:
+        digest.update(os.path.relpath(module, base).encode())
+
+        with open(module, 'rb') as file:
+            digest.update(sha256(file.read()).digest())
+    
+    digest.update('\0'.join(command).encode())
+
+    return digest.hexdigest()
+
+def restore(directory: str, outputs: list[str]) -> bool:
+    entries = [os.path.join(directory, str(index)) for index in range(len(outputs))]
+
+    if not all(os.path.exists(entry) for entry in entries):
+        return False
+    
+    for entry, output in zip(entries, outputs):
+        shutil.copy2(entry, output)
+    
+    return True
+
+def save(directory: str, outputs: list[str]):
+    temporary = f'{directory}.{os.getpid()}.tmp'
+
+    try:
+        os.makedirs(temporary, exist_ok=True)
+
+        for index, output in enumerate(outputs):
+            shutil.copy2(output, os.path.join(temporary, str(index)))
+        
+        os.replace(temporary, directory)
+    
+    except OSError:
+        shutil.rmtree(temporary, ignore_errors=True)
+
+    return
+
+# programs whose generated c for a shared module disagrees can not be on disk at the same time,
+# they are put in separate rounds, each written and built before the next one is written
+def schedule(pending: list, sources: list[dict[str, str]]) -> list[tuple[dict[str, str], list]]:
+    rounds = []
+
+    for target, source in zip(pending, sources):
+        for written, batch in rounds:
+            if all(written.get(filename, text) == text for filename, text in source.items()):
+                written.update(source)
+                batch.append(target)
+                break
+        else:
+            rounds.append((dict(source), [target]))
+    
+    return rounds
+
+def build_all(targets: list[tuple[str, str]], use_cache=True, jobs=1, cc=CC, cflags=CFLAGS) -> list[bool]:
+    command = [cc, *cflags]
+    cached = []
+    pending = []
+
+    with ProcessPoolExecutor(jobs) if jobs > 1 else nullcontext() as executor:
+        modules = compiler.load_modules(*(filename for filename, _ in targets), use_cache=use_cache, executor=executor)
+        programs = []
+
+        for filename, executable in targets:
+            order = compiler.import_order(modules, filename)
+            outputs = [f'{module}.c' for module in order] + [executable]
+            directory = os.path.join(cache.cache_dir(), 'build', build_key(filename, order, command))
+
+            cached.append(use_cache and restore(directory, outputs))
+
+            if not cached[-1]:
+                pending.append((filename, executable, directory, outputs))
+                programs.append({module: modules[module] for module in order})
+
+        if executor:
+            sources = list(executor.map(compiler.generate_program, [filename for filename, *_ in pending], programs))
+        else:
+            sources = [compiler.generate_program(filename, deepcopy(program)) for (filename, *_), program in zip(pending, programs)]
+    
+    with ThreadPoolExecutor(jobs) as runner:
+        for written, batch in schedule(pending, sources):
+            compiler.write_sources(written)
+            list(runner.map(partial(subprocess.run, check=True), [[*command, f'{filename}.c', '-o', executable] for filename, executable, _, _ in batch]))
+            
+            if use_cache:
+                for _, _, directory, outputs in batch:
+                    save(directory, outputs)
+
+    return cached
+
+def build_separate(targets: list[tuple[str, str]], use_cache=True, jobs=1, cc=CC, cflags=CFLAGS) -> list[bool]:
+    command = [cc, *cflags]
+
+    with ProcessPoolExecutor(jobs) if jobs > 1 else nullcontext() as executor:
+        modules = compiler.load_modules(*(filename for filename, _ in targets), use_cache=use_cache, executor=executor)
+        orders = [compiler.import_order(modules, filename) for filename, _ in targets]
+        reused = {}
+        depths = {}
+        waves = {}
+        pending = []
+
+        # a module only reads the interfaces of its imports, so modules at the same depth of the
+        # import graph are generated together once the wave before them is done
+        for module in dict.fromkeys(module for order in orders for module in order):
+            outputs = [f'{module}.{extension}' for extension in ('c', 'h', 'json', 'o')]
+            order = compiler.import_order(modules, module)
+            directory = os.path.join(cache.cache_dir(), 'object', build_key(module, order, command))
+            depths[module] = max((depths[name] +1 for name in compiler.import_paths(module, modules[module])), default=0)
+
+            reused[module] = use_cache and restore(directory, outputs)
+
+            if not reused[module]:
+                waves.setdefault(depths[module], []).append((module, {name: modules[name] for name in order}))
+                pending.append((module, directory, outputs))
+        
+        for depth in sorted(waves):
+            if executor:
+                list(executor.map(compiler.compile_separate, *zip(*waves[depth])))
+            else:
+                for module, program in waves[depth]:
+                    compiler.compile_separate(module, program)
+    
+    with ThreadPoolExecutor(jobs) as runner:
+        list(runner.map(partial(subprocess.run, check=True), [[*command, '-c', f'{module}.c', '-o', f'{module}.o'] for module, _, _ in pending]))
+
+        if use_cache:
+            for _, directory, outputs in pending:
+                save(directory, outputs)
+        
+        list(runner.map(partial(subprocess.run, check=True), [[*command, *(f'{module}.o' for module in order), '-o', executable] for order, (_, executable) in zip(orders, targets)]))
+
+    return [all(reused[module] for module in order) for order in orders]
+
+def build_piped(targets: list[tuple[str, str]], use_cache=True, jobs=1, cc=CC, cflags=CFLAGS) -> list[bool]:
+    command = [cc, *cflags, '-x', 'c', '-']
+    cached = []
+    pending = []
+
+    for filename, executable in targets:
+        modules = compiler.load_modules(filename, use_cache=use_cache)
+        directory = os.path.join(cache.cache_dir(), 'build', build_key(filename, compiler.import_order(modules, filename), command))
+
+        cached.append(use_cache and restore(directory, [executable]))
+
+        if not cached[-1]:
+            pending.append((compiler.compile_amalgamation(filename, modules), executable, directory))
+    
+    with ThreadPoolExecutor(jobs) as runner:
+        list(runner.map(lambda target: subprocess.run([*command, '-o', target[1]], input=target[0], text=True, check=True), pending))
+    
+    if use_cache:
+        for _, executable, directory in pending:
+            save(directory, [executable])
+
+    return cached
+
+def profile_flags(cc: str, directory: str) -> tuple[list[str], list[str]]:
+    if 'gcc' in os.path.basename(cc):
+        return [f'-fprofile-generate={directory}'], [f'-fprofile-use={directory}', '-Wno-missing-profile']
+    
+    return ['-fprofile-instr-generate'], [f'-fprofile-instr-use={os.path.join(directory, "merged.profdata")}']
+
+def build_pgo(targets: list[tuple[str, str]], training: list[str], jobs=1, cc=CC, cflags=CFLAGS, builder=build_all) -> list[bool]:
+
+    with TemporaryDirectory(prefix='akita-pgo-') as directory:
+        generate, use = profile_flags(cc, directory)
+
+        builder(targets, use_cache=False, jobs=jobs, cc=cc, cflags=[*cflags, *generate])
+        subprocess.run(training, check=True, env={**os.environ, 'LLVM_PROFILE_FILE': os.path.join(directory, '%p.profraw')})
+
+        if profiles := glob(os.path.join(directory, '*.profraw')):
+            subprocess.run([PROFDATA, 'merge', f'-output={os.path.join(directory, "merged.profdata")}', *profiles], check=True)
+
+        return builder(targets, use_cache=False, jobs=jobs, cc=cc, cflags=[*cflags, *use])
+
+def build(filename: str, executable: str, use_cache=True) -> bool:
+    return build_all([(filename, executable)], use_cache)[0]
@@ -0,0 +1,58 @@
+from functools import cache
+from hashlib import sha256
+import pickle
+import os
+
+from . import __version__
+
+from .tokenizer import Source
+
+def cache_dir() -> str:
+    if directory := os.environ.get('AKITA_CACHE_DIR'):
+        return directory
+    
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'akita')
+
+@cache
+def fingerprint() -> bytes:
+    digest = sha256(__version__.encode())
+    package = os.path.dirname(__file__)
+
+    for module in sorted(os.listdir(package)):
+        if module.endswith('.py'):
+            with open(os.path.join(package, module), 'rb') as file:
+                digest.update(file.read())
+    
+    return digest.digest()
+
+def source_key(source: Source) -> str:
+    digest = sha256(fingerprint())
+    digest.update(source.encode() if type(source) is str else source)
+
+    return digest.hexdigest()
+
+def load(kind: str, key: str):
+    try:
+        with open(os.path.join(cache_dir(), kind, key), 'rb') as file:
+            return pickle.load(file)
+    
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+def store(kind: str, key: str, value):
+    directory = os.path.join(cache_dir(), kind)
+    temporary = os.path.join(directory, f'{key}.{os.getpid()}.tmp')
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+
+        with open(temporary, 'wb') as file:
+            pickle.dump(value, file, pickle.HIGHEST_PROTOCOL)
+        
+        os.replace(temporary, os.path.join(directory, key))
+    
+    except (OSError, pickle.PicklingError, RecursionError):
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    return
@@ -1,289 +1,539 @@
-from os import path
+from contextlib import contextmanager
+from functools import partial
+from typing import TextIO
 from io import StringIO
+from os import path, getpid, replace, remove
+import json
+import re
 
 from .tokenizer import Keyword, Literal, Comment, Name
-from .tokenizer import tokenize, Token
-from .parser import BinaryOperation, Call, Class, Def, Body, Import, Item, Attribute, Return, Set, List, AnyOperand
+from .tokenizer import tokenize, map_source, Token
+from .parser import BinaryOperation, Call, Class, Def, Body, Import, Item, Return, Set, List, Dict, AnyOperand
 from .parser import If, Elif, Else, While, For
-from .parser import parse
+from .parser import parse, spine
+from .infer import Namespace, resolve_type, infer, infer_module
+from .optimize import optimize, optimize_module
+from . import cache
 
 NEWLINE = '\n'
 SOFTTAB= ' ' * 4
 
-class Namespace:
-    def __init__(self, variables: list[Name]=list(), functions: dict[tuple, Name]=dict()):
-        self.variables = variables
-        self.functions = functions
+STR_PREFIX= 4
+ESCAPE = re.compile(r'(\\(?:[0-7]{1,3}|x[0-9A-Fa-f]+|u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.))|(.)', re.DOTALL)
+
+class Writer:
+    def __init__(self, output: TextIO):
+        self.output = output
+        self.indent = 0
+    
+    def write(self, text: str):
+        self.output.write(text)
     
-    def __repr__(self):
-        return f'Namespace({self.variables})'
+    def emit(self, line: str):
+        self.output.write(NEWLINE + SOFTTAB * self.indent + line)
+    
+    @contextmanager
+    def block(self):
+        self.emit('{')
+        self.indent += 1
+
+        try:
+            yield self
+        finally:
+            self.indent -= 1
+        
+        self.emit('}')
 
-def compile_expression(namespace: Namespace, operand: AnyOperand):
+def compile_expression(operand: AnyOperand):
     if type(operand) is Name:
         return operand.value
     elif type(operand) is Literal:
         if type(operand.value) is str:
-            return '"%s"' % operand.value.replace('"', r'\"')
+            return compile_literal(operand.value.replace('"', r'\"'))
+        elif type(operand.value) is bool:
+            return 'true' if operand.value else 'false'
 
         return operand.value
     
     elif type(operand) is List:
-        return f'{{{", ".join(compile_expression(namespace, item) for item in operand.items)}}}'
-    
-    elif type(operand) is Item:
-        operand.head.hint = get_hint(namespace, operand.head)
+        element = resolve_type(operand.hint).value
 
-        return f'{operand.head.value}[{compile_expression(namespace, operand.indice)}]'
-    
-    elif type(operand) is Attribute:
-        if type(operand.name) is not Call:
-            raise NotImplementedError
-        
-        if not operand.name.name.value.startswith(operand.head.value):
-            operand.name.name = Name(operand.head.value + '__' + operand.name.name.value, operand.name.hint)
+        if not operand.items:
+            return f'list__{element}____from(0, NULL)'
 
-        return compile_call(namespace, operand.name)
-
-    elif type(operand) is Call:
-        return compile_call(namespace, operand)
+        return f'list__{element}____from({len(operand.items)}, ({element}[]) {{{", ".join(str(compile_expression(item)) for item in operand.items)}}})'
     
-    elif type(operand) is BinaryOperation and operand.hint == 'str':
-        if operand.right.hint is None:
-            operand.right.hint = get_hint(namespace, operand.right)
-        
-        if operand.left.hint is None:
-            operand.left.hint = get_hint(namespace, operand.left)
-
-        if operand.operator is Token.Equal:
-            return f'strcmp({compile_expression(namespace, operand.left)}, {compile_expression(namespace, operand.right)}) == 0'
-        elif operand.operator is Token.NotEqual:
-            return f'strcmp({compile_expression(namespace, operand.left)}, {compile_expression(namespace, operand.right)}) != 0'
+    elif type(operand) is Dict:
+        table = resolve_type(operand.hint).value
         
-        return f'cat({compile_expression(namespace, operand.left)}, {compile_expression(namespace, operand.right)})'
+        if not operand.keys:
+            return f'{table}__new(0)'
         
-        
-    return f'{compile_expression(namespace, operand.left)} {operand.operator.value} {compile_expression(namespace, operand.right)}'
+        keys, values = (f'({resolve_type(indice).value}[]) {{{", ".join(str(compile_expression(item)) for item in items)}}}' for indice, items in zip(operand.hint.indices, (operand.keys, operand.values)))
+        return f'{table}__from({len(operand.keys)}, {keys}, {values})'
+    
+    elif type(operand) is Item:
+        if operand.container is not None and operand.container.value.startswith('list__'):
+            return f'{compile_expression(operand.head)}->items[{compile_expression(operand.indice)}]'
+        elif operand.container is not None and operand.container.value.startswith('dict__'):
+            return f'{operand.container.value}__getitem({compile_expression(operand.head)}, {compile_expression(operand.indice)})'
 
-def get_hint(namespace: Namespace, operand: AnyOperand):
-    if type(operand) is Name and operand in namespace.variables:
-        return namespace.variables[namespace.variables.index(operand)].hint
-    elif type(operand) is Call:
-        if operand.name == 'str':
-            return Name('str', Name('type'))
+        return f'{compile_expression(operand.head)}[{compile_expression(operand.indice)}]'
 
-        return get_function(namespace, operand).rethint
+    elif type(operand) is Call:
+        return compile_call(operand)
+    
+    elif type(operand) is BinaryOperation and concatenated(operand):
+        return compile_concatenation(concatenation(operand))
+    
     elif type(operand) is BinaryOperation:
-        operand.hint = get_hint(namespace, operand.left)
-    elif type(operand) is Item:
-        hint = get_hint(namespace, operand.head)
+        leaf, operations = spine(operand, until=concatenated)
+        code = compile_expression(leaf)
 
-        if hint.value == "str":
-            return Name('char', Name('type'))
-        elif hint.value == "list__str__":
-            return Name('str', Name('type'))
+        for operation in operations:
+            code = compile_operation(operation, code)
         
-        return hint
-    
-    elif type(operand) is Attribute:
-        if type(operand.name) is not Call:
-            raise NotImplementedError
+        return code
     
-        operand.name.name = Name(operand.head.value + '__' + operand.name.name.value)
+    raise NotImplementedError
 
-        return get_hint(namespace, operand.name)
+def compile_operation(operation: BinaryOperation, left: str) -> str:
+    if operation.operands == 'str' and operation.operator in (Token.EqualEqual, Token.NotEqual):
+        return f'{"!" if operation.operator is Token.NotEqual else ""}str_eq({left}, {compile_expression(operation.right)})'
+    elif operation.inferred == 'str':
+        return f'cat({left}, {compile_expression(operation.right)})'
     
-    elif type(operand) is List:
-        operand.hint = get_hint(namespace, operand.items[0])
-        return Name(f'list__{operand.hint.value}__', Name('type'))
+    return f'{left} {operation.operator.value} {compile_expression(operation.right)}'
+
+# literals carry the same little-endian length prefix the runtime writes in front of every str
+def compile_literal(text: str) -> str:
+    length = sum(escaped_length(escape) if escape else len(char.encode()) for escape, char in ESCAPE.findall(text))
+    prefix = ''.join(f'\\{byte:03o}' for byte in length.to_bytes(STR_PREFIX, 'little'))
 
-    return operand.hint
+    return f'str_literal("{prefix}" "{text}")'
 
-def get_function(namespace: Namespace, call: Call):
-    if (functions := namespace.functions.get(call.name)) is None:
-        raise NameError(f'there is no function named `{call.name.value}`')
+def escaped_length(escape: str) -> int:
+    if escape[1] in 'uU':
+        return len(chr(int(escape[2:], 16)).encode())
     
-    call_signature = tuple(compile_type(namespace, get_hint(namespace, arg)) for arg in call.args)
+    return 1
 
-    if call_signature not in functions:
-        print(functions)
-        raise Exception(f'function with signature `{call.name.value}({", ".join((sign.value if sign else "?") for sign in call_signature)})` does not exists')
+def concatenated(operation: BinaryOperation) -> bool:
+    return operation.operator is Token.Plus and operation.inferred == 'str'
 
-    return functions[call_signature]
+def concatenation(operand: AnyOperand) -> list[AnyOperand]:
+    leaf, operations = spine(operand, until=lambda operation: not concatenated(operation))
 
-def compile_call(namespace: Namespace, call: Call):
-    function = get_function(namespace, call)
-    return f'{function.name.value.replace(".", "__")}({", ".join(str(compile_expression(namespace, arg)) for arg in call.args)})'
+    return [leaf, *(operation.right for operation in operations)]
 
-def compile_body(namespace: Namespace, body: Body, indent=0):
-    INDENTTAB = SOFTTAB * indent
-    NEWLINEINDENT = NEWLINE + INDENTTAB
+def compile_concatenation(pieces: list[AnyOperand]):
+    if len(pieces) == 2:
+        return f'cat({compile_expression(pieces[0])}, {compile_expression(pieces[1])})'
 
-    def compile(ast):
+    return f'cat_n({len(pieces)}, {", ".join(str(compile_expression(piece)) for piece in pieces)})'
+
+def compile_call(call: Call):
+    return f'{call.function.name.value.replace(".", "__")}({", ".join(str(compile_expression(arg)) for arg in call.args)})'
+
+def compile_body(writer: Writer, body: Body, function: Def=None, loop: While=None):
+    def compile_block(operand, body: Body, loop: While=loop):
+        writer.emit(operand)
+
+        with writer.block():
+            compile_body(writer, body, function, loop)
+        
+        return
+    
+    # a loop keeps its setup in a block of its own, a region is marked once the setup is done
+    # and released at the end of every iteration
+    def compile_loop(operand, *setup: str):
+        if not ast.region and not setup:
+            compile_block(operand, ast.body, ast)
+            return
+        
+        with writer.block():
+            for line in setup:
+                writer.emit(line)
+            
+            if not ast.region:
+                compile_block(operand, ast.body, ast)
+                return
+            
+            writer.emit('arena_mark akita_loop = akita_mark();')
+            writer.emit(operand)
+
+            with writer.block():
+                compile_body(writer, ast.body, function, ast)
+                writer.emit('akita_reset(akita_loop);')
+        
+        return
+
+    for ast in body.lines:
         if ast is Token.Ellipsis:
-            return f'// ...'
+            writer.emit(f'// ...')
         
         elif type(ast) is Comment:
             if ast.value.startswith('emit '):
-                return ast.value.removeprefix('emit ')
-            
-            return f'// {ast.value}'
-        elif type(ast) is Keyword:
-            return f'{ast.value};'
+                writer.emit(ast.value.removeprefix('emit '))
+            else:
+                writer.emit(f'// {ast.value}')
         
-        elif type(ast) is Attribute:
-            if type(ast.name) is not Call:
-                raise NotImplementedError
+        elif type(ast) is Keyword:
+            if loop is not None and loop.region:
+                writer.emit('akita_reset(akita_loop);')
+            
+            writer.emit(f'{ast.value};')
+
+        elif type(ast) is Return:
+            if function is None or not function.region:
+                writer.emit(f'return {compile_expression(ast.operand)};')
+            elif function.rethint is None:
+                writer.emit('akita_reset(akita_region);')
+                writer.emit(f'return {compile_expression(ast.operand)};')
+            else:
+                writer.emit(f'{resolve_type(function.rethint).value} akita_result = {compile_expression(ast.operand)};')
+                writer.emit('akita_reset(akita_region);')
+                writer.emit('return akita_result;')
         
-            ast.name.name = Name(ast.head.value + '__' + ast.name.name.value)
-
-            return f'{compile_call(namespace, ast.name)};'
-
-        if type(ast) is Return:
-            return f'return {compile_expression(namespace, ast.operand)};'
         elif type(ast) is Call:
-            return f'{compile_call(namespace, ast)};'
+            writer.emit(f'{compile_call(ast)};')
         elif type(ast) is Set:
-            if ast.name.hint is None:
-                ast.name.hint = get_hint(namespace, ast.name)
-            
-            if ast.name.hint is None:
-                ast.name.hint = get_hint(namespace, ast.value)
-
-            if ast.name in namespace.variables:
-                if ast.name.hint != (name := namespace.variables[namespace.variables.index(ast.name)]).hint:
-                    raise TypeError(f'variable `{name.value}` is of type `{name.hint.value}`, but a `{ast.name.hint.value}` was provided')
-                
+            if not ast.declaration:
                 if ast.name.hint.value == 'str' and ast.token is Token.PlusEqual:
-                    return f'{ast.name.value} = cat({ast.name.value}, {compile_expression(namespace, ast.value)});'
-                
-                return f'{ast.name.value} {ast.token.value} {compile_expression(namespace, ast.value)};'
-            
-            namespace.variables.append(ast.name)
-
-            if type(ast.value) is List:
-                return f'{ast.name.hint.value} {ast.name.value}[] = {compile_expression(namespace, ast.value)};{NEWLINEINDENT}int len_{ast.name.value} = {len(ast.value.items)};'
-
-            return f'{compile_type(namespace, ast.name.hint).value} {ast.name.value} = {compile_expression(namespace, ast.value)};'
+                    writer.emit(f'{ast.name.value} = {compile_concatenation([ast.name, *concatenation(ast.value)])};')
+                else:
+                    writer.emit(f'{ast.name.value} {ast.token.value} {compile_expression(ast.value)};')
+            else:
+                writer.emit(f'{resolve_type(ast.name.hint).value} {ast.name.value} = {compile_expression(ast.value)};')
         
         elif type(ast) is If:
-            return f'if ({compile_expression(namespace, ast.operand)}){NEWLINEINDENT}{{{compile_body(namespace, ast.body, indent +1)}{NEWLINEINDENT}}}'
+            compile_block(f'if ({compile_expression(ast.operand)})', ast.body)
         elif type(ast) is Elif:
-            return f'else if ({compile_expression(namespace, ast.operand)}){NEWLINEINDENT}{{{compile_body(namespace, ast.body, indent +1)}{NEWLINEINDENT}}}'
+            compile_block(f'else if ({compile_expression(ast.operand)})', ast.body)
         elif type(ast) is Else:
-            return f'else{NEWLINEINDENT}{{{compile_body(namespace, ast.body, indent +1)}{NEWLINEINDENT}}}'
+            compile_block(f'else', ast.body)
 
         elif type(ast) is While:
-            return f'while ({compile_expression(namespace, ast.operand)}){NEWLINEINDENT}{{{compile_body(namespace, ast.body, indent +1)}{NEWLINEINDENT}}}'
+            compile_loop(f'while ({compile_expression(ast.operand)})')
         elif type(ast) is For:
-            if ast.operand.hint is None:
-                ast.operand.hint = get_hint(namespace, ast.operand)
+            if ast.iterable == "str_iterator_p":
+                compile_loop(f'for (str {ast.name.value}=next({ast.name.value}_iterator); !{ast.name.value}_iterator->stopped; {ast.name.value} = next({ast.name.value}_iterator))',
+                    f'str_iterator_p {ast.name.value}_iterator = {compile_expression(ast.operand)};')
             
-            if type(ast.operand.hint) is Item:
-                ast.operand.hint = ast.operand.hint.hint
+            # the element is a one character str in a stack buffer, rewritten in place on every step
+            elif ast.iterable == "str_iterator":
+                compile_loop(f"for (str {ast.name.value}={ast.name.value}_buffer + STR_PREFIX; ({ast.name.value}[0] = {ast.name.value}_iterator[{ast.name.value}_index]) != '\\0'; {ast.name.value}_index++)",
+                    f'str {ast.name.value}_iterator = {compile_expression(ast.operand)};', f'char {ast.name.value}_buffer[STR_PREFIX + 2] = {{1}};', f'size_t {ast.name.value}_index = 0;')
             
-            if ast.operand.hint == "str_iterator_p":
-                if ast.name not in namespace.variables:
-                    ast.name.hint = Name('str', Name('type'))
-                    namespace.variables.append(ast.name)
-                
-                return f'str_iterator_p {ast.name.value}_iterator = {compile_expression(namespace, ast.operand)};{NEWLINEINDENT}for (str {ast.name.value}=next({ast.name.value}_iterator); !{ast.name.value}_iterator->stopped; {ast.name.value} = next({ast.name.value}_iterator)){NEWLINEINDENT}{{{compile_body(namespace, ast.body, indent +1)}{NEWLINEINDENT}}}'
-            elif ast.operand.hint == "str":
-                if ast.name not in namespace.variables:
-                    ast.name.hint = Name('char', Name('type'))
-                    namespace.variables.append(ast.name)
-
-                return f"str {ast.name.value}_iterator = {compile_expression(namespace, ast.operand)};{NEWLINEINDENT}for (char {ast.name.value}={ast.name.value}_iterator++[0]; {ast.name.value} != '\\0'; {ast.name.value} = {ast.name.value}_iterator++[0]){NEWLINEINDENT}{{{compile_body(namespace, ast.body, indent +1)}{NEWLINEINDENT}}}"
+            elif ast.iterable == "str":
+                compile_loop(f"for (char {ast.name.value}={ast.name.value}_iterator++[0]; {ast.name.value} != '\\0'; {ast.name.value} = {ast.name.value}_iterator++[0])",
+                    f'str {ast.name.value}_iterator = {compile_expression(ast.operand)};')
             
-            elif ast.operand.hint == "list__str__":
-                if ast.name not in namespace.variables:
-                    ast.name.hint = Name('str', Name('type'))
-                    namespace.variables.append(ast.name)
-                
-                if type(ast.operand) is List:
-                    return f"list__str__ items[] = {compile_expression(namespace, ast.operand)};{NEWLINEINDENT}int len_items = {len(ast.operand.items)};{NEWLINEINDENT}int index_items = 0;{NEWLINEINDENT * 2}for (str {ast.name.value}=items[index_items]; index_items < len_items; {ast.name.value} = items[++index_items]){NEWLINEINDENT}{{{compile_body(namespace, ast.body, indent +1)}{NEWLINEINDENT}}}"
+            # a dict yields its keys, skipping empty and deleted slots
+            elif ast.iterable is not None and ast.iterable.value.startswith('dict__'):
+                compile_loop(f'for ({resolve_type(ast.name.hint).value} {ast.name.value}; {ast.iterable.value}__next({ast.name.value}_dict, &{ast.name.value}_index) && ({ast.name.value} = {ast.name.value}_dict->keys[{ast.name.value}_index], true); {ast.name.value}_index++)',
+                    f'{ast.iterable.value} {ast.name.value}_dict = {compile_expression(ast.operand)};', f'int {ast.name.value}_index = 0;')
+            
+            elif ast.iterable is not None and ast.iterable.value.startswith('list__'):
+                compile_loop(f'for ({resolve_type(ast.name.hint).value} {ast.name.value}; {ast.name.value}_index < {ast.name.value}_list->length && ({ast.name.value} = {ast.name.value}_list->items[{ast.name.value}_index], true); {ast.name.value}_index++)',
+                    f'{ast.iterable.value} {ast.name.value}_list = {compile_expression(ast.operand)};', f'int {ast.name.value}_index = 0;')
+            
+            else:
+                compile_loop(f'for (int {ast.name.value}=0; {ast.name.value} < {compile_expression(ast.operand)}; {ast.name.value}++)')
+        
+        else:
+            writer.emit(f'{ast}')
+
+    return
+
+def compile_def(writer: Writer, namespace: Namespace, ast: Def):
+    is_dummy = len(ast.body.lines) == 1 and ast.body.lines[0] is Token.Ellipsis
+    arguments = ast.name.value == 'main' and [resolve_type(arg.hint).value for arg in ast.args] == ['int', 'list__str__']
+    declaration = f'{resolve_type(ast.rethint).value} {ast.symbol}({", ".join(resolve_type(arg.hint).value + " " + arg.value for arg in ast.args)})'
+
+    # process arguments come from the c runtime as an array without length prefixes
+    if arguments:
+        declaration = f'int main(int {ast.args[0].value}, str* akita_arguments)'
 
-                return f"int index_{ast.operand.value} = 0;{NEWLINEINDENT * 2}for (str {ast.name.value}={ast.operand.value}[index_{ast.operand.value}]; index_{ast.operand.value} < len_{ast.operand.value}; {ast.name.value} = {ast.operand.value}[++index_{ast.operand.value}]){NEWLINEINDENT}{{{compile_body(namespace, ast.body, indent +1)}{NEWLINEINDENT}}}"
+    if not is_dummy:
+        namespace.prototypes.append(f'{declaration};')
+    else:
+        writer.write('/*' + NEWLINE)
 
-            if ast.name not in namespace.variables:
-                ast.name.hint = Name('int', Name('type'))
-                namespace.variables.append(ast.name)
+    writer.write(declaration)
 
-            return f'for (int {ast.name.value}=0; {ast.name.value} < {compile_expression(namespace, ast.operand)}; {ast.name.value}++){NEWLINEINDENT}{{{compile_body(namespace, ast.body, indent +1)}{NEWLINEINDENT}}}'
+    with writer.block():
+        if arguments:
+            writer.emit(f'str_arguments({ast.args[0].value}, akita_arguments);')
+            writer.emit(f'list__str__ {ast.args[1].value} = list__str____from({ast.args[0].value}, akita_arguments);')
+        
+        if ast.region:
+            writer.emit('arena_mark akita_region = akita_mark();')
+        
+        compile_body(writer, ast.body, ast)
 
-        return ast
+        if ast.region and type(ast.body.lines[-1]) is not Return:
+            writer.emit('akita_reset(akita_region);')
 
-    return "".join(f'{NEWLINEINDENT}{compile(line)}' for line in body.lines)
+    if is_dummy:
+        writer.write(NEWLINE + '*/')
 
-def compile_type(namespace: Namespace, name: Name):
-    if name is None:
-        return Name('void')
-    elif type(name) is Item:
-        return Name(f'{name.head.value}__{name.indice.value}__')
-    elif type(name) is Name:
-        return name
+    return
 
-    return name
+def compile_class(writer: Writer, namespace: Namespace, ast: Class):
+    for index, line in enumerate(ast.body.lines):
+        if index:
+            writer.write(NEWLINE)
 
-def compile_def(namespace: Namespace, ast: Def, prefix: Name=None):
-    if prefix:
-        ast.name = Name(compile_type(namespace, prefix).value + '.' + ast.name.value, ast.name or ast.rethint)
+        if type(line) is Comment:
+            writer.write(f'// {line.value}')
+        elif line is Token.Ellipsis:
+            writer.write(f'// ...')
+        else:
+            compile_def(writer, namespace, line)
+    
+    return
 
-    local_namespace = Namespace(list(namespace.variables), namespace.functions)
-    local_namespace.variables.extend(ast.args)
+def compile_toplevel(writer: Writer, namespace: Namespace, ast):
+    if type(ast) is Def:
+        compile_def(writer, namespace, ast)
+    
+    elif type(ast) is Class:
+        compile_class(writer, namespace, ast)
+    
+    elif type(ast) is Import:
+        writer.write(f'#include "{ast.module.value}.py.c"')
 
-    if len(ast.body.lines) == 1 and ast.body.lines[0] is Token.Ellipsis:
-        is_dummy = True
+    elif type(ast) is Comment:
+        if ast.value.startswith('emit '):
+            writer.write(f'{ast.value.removeprefix("emit ")}')
+        else:
+            writer.write(f'// {ast.value}')
+    
     else:
-        is_dummy = False
+        writer.write(f'{ast}')
+
+    return
+
+def compile(ast, namespace: Namespace=None) -> str:
+    if namespace is None:
+        namespace = Namespace()
+    
+    writer = Writer(StringIO())
+    optimize(ast)
+    infer(namespace, ast)
+    compile_toplevel(writer, namespace, ast)
+
+    return writer.output.getvalue()
+
+def parse_filename(name: str, use_cache=True) -> list:
+    source = map_source(name)
 
+    if not use_cache:
+        return list(parse(tokenize(source)))
+    
+    key = cache.source_key(source)
+
+    if (ast := cache.load('ast', key)) is None:
+        ast = list(parse(tokenize(source)))
+        cache.store('ast', key, ast)
+    
+    return ast
 
-    if ast.name in namespace.functions:
-        new_name = f'{ast.name.value.replace(".", "__")}_{"_".join(compile_type(namespace, arg.hint).value for arg in ast.args)}{"_" + ast.name.hint.value if ast.name.hint else ""}'
+def import_paths(name: str, module: list) -> list[str]:
+    return [path.join(path.dirname(name), f'{ast.module.value}.py') for ast in module if type(ast) is Import]
+
+def load_modules(*names: str, use_cache=True, executor=None) -> dict[str, list]:
+    modules = {}
+    pending = list(names)
+    load = partial(parse_filename, use_cache=use_cache)
+
+    while pending := [name for name in dict.fromkeys(pending) if name not in modules]:
+        modules.update(zip(pending, executor.map(load, pending) if executor else map(load, pending)))
+        pending = [module for name in pending for module in import_paths(name, modules[name])]
+    
+    return modules
+
+def import_order(modules: dict[str, list], name: str) -> list[str]:
+    order = []
+    visiting = [name]
+    stack = [(name, iter(import_paths(name, modules[name])))]
+
+    while stack:
+        name, imports = stack[-1]
+
+        if (module := next(imports, None)) is None:
+            stack.pop()
+            visiting.remove(name)
+            order.append(name)
+        elif module in visiting:
+            raise ImportError(f'circular import of `{module}` from `{name}`')
+        elif module not in order:
+            visiting.append(module)
+            stack.append((module, iter(import_paths(module, modules[module]))))
+    
+    return order
+
+def include_guard(name: str, extension='c') -> str:
+    return 'AKITA_' + ''.join(char if char.isalnum() else '_' for char in path.basename(name).upper()) + f'_{extension.upper()}'
+
+@contextmanager
+def open_output(name: str):
+    temporary = f'{name}.{getpid()}.tmp'
+
+    try:
+        with open(temporary, 'w') as output:
+            yield Writer(output)
         
-        namespace.functions[ast.name].update({tuple(compile_type(namespace, sign) for sign in ast.signature): Def(Name(new_name), ast.args, ast.body, ast.rethint)})
+        replace(temporary, name)
+    
+    finally:
+        if path.exists(temporary):
+            remove(temporary)
+
+@contextmanager
+def guarded(writer: Writer, name: str, extension: str):
+    guard = include_guard(name, extension)
+
+    writer.write(f'#ifndef {guard}{NEWLINE}#define {guard}{NEWLINE}')
+    yield writer
+    writer.write(f'#endif // {guard}{NEWLINE}')
+
+def compile_module(writer: Writer, namespace: Namespace, name: str, module: list, imports=True):
+    optimize_module(module)
+    infer_module(namespace, module)
+
+    with guarded(writer, name, 'c'):
+        for ast in module:
+            if imports or type(ast) is not Import:
+                compile_toplevel(writer, namespace, ast)
+                writer.write(NEWLINE)
+    
+    return
+
+# the c of a module depends on the program it is generated for, overloads are mangled by what else is imported
+def generate_program(name: str, modules: dict[str, list]) -> dict[str, str]:
+    namespace = Namespace()
+    sources = {}
 
-        return f'{"/*" + NEWLINE if is_dummy else ""}{compile_type(namespace, ast.rethint).value} {new_name}({", ".join(compile_type(namespace, arg.hint).value + " " + arg.value for arg in ast.args)}){NEWLINE}{{{compile_body(local_namespace, ast.body, indent=1)}{NEWLINE}}}{NEWLINE + "*/" if is_dummy else ""}'
+    for module in import_order(modules, name):
+        writer = Writer(StringIO())
+        compile_module(writer, namespace, module, modules[module])
+        sources[f'{module}.c'] = writer.output.getvalue()
     
-    namespace.functions[ast.name] = {tuple(compile_type(namespace, sign) for sign in ast.signature): ast}
+    return sources
 
-    return f'{"/*" + NEWLINE if is_dummy else ""}{ast.rethint.value if ast.rethint else "void"} {ast.name.value.replace(".", "__")}({", ".join(compile_type(namespace, arg.hint).value + " " + arg.value + ("[]" if compile_type(namespace, arg.hint).value.startswith("list") else "") for arg in ast.args)}){NEWLINE}{{{compile_body(local_namespace, ast.body, indent=1)}{NEWLINE}}}{NEWLINE + "*/" if is_dummy else ""}'
+def write_sources(sources: dict[str, str]):
+    for filename, source in sources.items():
+        with open_output(filename) as writer:
+            writer.write(source)
+    
+    return
 
-def compile_class(namespace: Namespace, ast: Class):
-    def compile(line):
-        if type(line) is Comment:
-            return f'// {line.value}'
-        elif line is Token.Ellipsis:
-            return f'// ...'
+def dump_hint(hint):
+    if hint is None:
+        return None
+    elif type(hint) is Item:
+        return [dump_hint(hint.head), *(dump_hint(indice) for indice in hint.indices)]
+    
+    return hint.value
 
-        return compile_def(namespace, line, prefix=ast.name)
+def load_hint(hint):
+    if hint is None:
+        return None
+    elif type(hint) is list:
+        return Item(load_hint(hint[0]), load_hint(hint[1]) if len(hint) == 2 else tuple(load_hint(indice) for indice in hint[1:]))
+    
+    return Name(hint)
 
-    return f'\n'.join(compile(line) for line in ast.body.lines)
+def function_entries(namespace: Namespace) -> list[tuple[Name, tuple, Def]]:
+    return [(name, signature, function) for name, functions in namespace.functions.items() for signature, function in functions.items()]
 
+def load_interface(namespace: Namespace, name: str):
+    with open(f'{name}.json') as file:
+        interface = json.load(file)
+    
+    for function in interface['functions']:
+        signature = tuple(Name(sign) for sign in function['signature'])
+        namespace.functions.setdefault(Name(function['name']), {})[signature] = Def(Name(function['symbol']), (), Body(()), load_hint(function['returns']))
+    
+    return
 
-def compile(ast, namespace=Namespace(), path='.'):
-    if type(ast) is Def:
-        return compile_def(namespace, ast)
+def store_interface(namespace: Namespace, name: str, functions: list[tuple[Name, tuple, Def]]):
+    interface = {
+        'module': path.basename(name),
+        'functions': [
+            {'name': key.value, 'signature': [sign.value for sign in signature], 'symbol': function.name.value, 'returns': dump_hint(function.rethint)}
+            for key, signature, function in functions
+        ]
+    }
+
+    with open_output(f'{name}.json') as writer:
+        json.dump(interface, writer.output, indent=1)
     
-    elif type(ast) is Class:
-        return compile_class(namespace, ast)
+    return
+
+def compile_separate(name: str, modules: dict[str, list]):
+    namespace = Namespace()
+
+    for module in import_order(modules, name)[:-1]:
+        load_interface(namespace, module)
     
-    elif type(ast) is Import:
-        compile_filename(f'{path}/{ast.module.value}.py', namespace)
-        return f'#include "{ast.module.value}.py.c"'
+    imported = {(key, signature) for key, signature, _ in function_entries(namespace)}
+    header = []
 
-    elif type(ast) is Comment:
-        if ast.value.startswith('emit '):
-            return f'{ast.value.removeprefix("emit ")}'
+    optimize_module(modules[name])
+    infer_module(namespace, modules[name])
+
+    with open_output(f'{name}.c') as writer, guarded(writer, name, 'c'):
+        for ast in modules[name]:
+            if type(ast) is Import:
+                header.append(f'#include "{ast.module.value}.py.h"')
+                writer.write(header[-1])
+            
+            elif type(ast) is Comment and ast.value.startswith('emit '):
+                header.append(ast.value.removeprefix('emit '))
+                writer.write(header[-1])
+            
+            else:
+                start = len(namespace.prototypes)
+                compile_toplevel(writer, namespace, ast)
+                header.extend(namespace.prototypes[start:])
+            
+            writer.write(NEWLINE)
+    
+    with open_output(f'{name}.h') as writer, guarded(writer, name, 'h'):
+        for line in header:
+            writer.write(line + NEWLINE)
+    
+    store_interface(namespace, name, [entry for entry in function_entries(namespace) if entry[:2] not in imported])
+    return
 
-        return f'// {ast.value}'
+def compile_amalgamation(name: str, modules: dict[str, list]) -> str:
+    namespace = Namespace()
+    writer = Writer(StringIO())
 
-    return ast
+    for module in import_order(modules, name):
+        compile_module(writer, namespace, module, modules[module], imports=False)
+    
+    return writer.output.getvalue()
 
-def compile_filename(name: str, namespace=Namespace()):
-    output = open(f'{name}.c', 'w')
+def compile_source(text: str, directory='.', use_cache=True) -> str:
+    name = path.join(directory, '__main__.py')
+    entry = list(parse(tokenize(text)))
+    modules = load_modules(*import_paths(name, entry), use_cache=use_cache)
+    modules[name] = entry
+
+    return compile_amalgamation(name, modules)
+
+def compile_filename(name: str, namespace: Namespace=None, use_cache=True):
+    if namespace is None:
+        namespace = Namespace()
+    
+    modules = load_modules(name, use_cache=use_cache)
 
-    for ast in parse(tokenize(StringIO(open(name).read()))):
-        output.write(compile(ast, namespace, path.dirname(name)))
-        output.write('\n')
+    for module in import_order(modules, name):
+        with open_output(f'{module}.c') as writer:
+            compile_module(writer, namespace, module, modules[module])
     
     return
@@ -0,0 +1,418 @@
+from .tokenizer import Literal, Comment, Name, Token
+from .parser import BinaryOperation, Call, Class, Def, Body, Item, Attribute, Return, Set, List, Dict, AnyOperand
+from .parser import If, Elif, Else, While, For
+from .parser import COMPARISONS, spine
+
+class Scope:
+    __slots__ = ('symbols', 'parent')
+    
+    def __init__(self, parent: "Scope"=None):
+        self.symbols = {}
+        self.parent = parent
+    
+    def __repr__(self):
+        return f'Scope({list(self.symbols.values())}, {self.parent})'
+    
+    def __contains__(self, name: Name):
+        return self.lookup(name) is not None
+    
+    def lookup(self, name: Name) -> Name:
+        scope = self
+        
+        while scope is not None:
+            if (symbol := scope.symbols.get(name.value)) is not None:
+                return symbol
+            
+            scope = scope.parent
+        
+        return None
+    
+    def define(self, name: Name):
+        self.symbols[name.value] = name
+    
+    def child(self) -> "Scope":
+        return Scope(self)
+
+class Region:
+    __slots__ = ('node', 'scope', 'escapes', 'allocates', 'aliases', 'shared', 'borrowed')
+    
+    def __init__(self, node: Def | While, scope: Scope, aliases: set[str]=None):
+        self.node = node
+        self.scope = scope
+        self.escapes = False
+        self.allocates = False
+        self.aliases = aliases
+        self.shared = False
+        self.borrowed = set()
+    
+    def __repr__(self):
+        return f'Region({self.node}, {self.escapes}, {self.allocates})'
+
+class Namespace:
+    def __init__(self, variables: Scope=None, functions: dict[tuple, Name]=None, prototypes: list[str]=None, regions: list[Region]=None):
+        self.variables = variables if variables is not None else Scope()
+        self.functions = functions if functions is not None else {}
+        self.prototypes = prototypes if prototypes is not None else []
+        self.regions = regions if regions is not None else []
+    
+    def __repr__(self):
+        return f'Namespace({self.variables})'
+    
+    def child(self) -> "Namespace":
+        return Namespace(self.variables.child(), self.functions, self.prototypes, self.regions)
+
+def resolve_type(name: Name) -> Name:
+    if name is None:
+        return Name('void')
+    elif type(name) is Item:
+        return Name(f'{name.head.value}__{"__".join(resolve_type(indice).value for indice in name.indices)}__')
+    
+    return name
+
+# what iterating over a container yields, the keys for a dict
+def element_type(hint: Name) -> Name:
+    if type(hint) is Item and hint.head in ('list', 'dict'):
+        return hint.indices[0]
+    elif hint is not None and hint.value.startswith('list__') and hint.value.endswith('__'):
+        return Name(hint.value.removeprefix('list__').removesuffix('__'), Name('type'))
+    
+    return None
+
+def scalar(hint: Name) -> bool:
+    return hint is not None and resolve_type(hint).value in ('void', 'bool', 'char', 'int', 'float')
+
+def outside(namespace: Namespace, name: Name, region: Region) -> bool:
+    if name.value in region.borrowed:
+        return True
+    
+    scope = namespace.variables
+    
+    while scope is not None:
+        if name.value in scope.symbols:
+            return False
+        elif scope is region.scope:
+            return True
+        
+        scope = scope.parent
+    
+    return True
+
+def allocates(namespace: Namespace):
+    for region in namespace.regions:
+        region.allocates = True
+    
+    return
+
+def aliased(region: Region, operand: AnyOperand) -> bool:
+    if type(operand) is Name:
+        return operand.value in region.aliases
+    elif type(operand) is Item:
+        return aliased(region, operand.head)
+    elif type(operand) is Call:
+        return any(aliased(region, arg) for arg in operand.args)
+    elif type(operand) is List:
+        return any(aliased(region, item) for item in operand.items)
+    elif type(operand) is Dict:
+        return any(aliased(region, item) for item in (*operand.keys, *operand.values))
+    
+    return False
+
+def mutable(hint: Name) -> bool:
+    return hint is not None and resolve_type(hint).value.startswith(('list__', 'dict__'))
+
+# a container bound to a local from one declared outside of a region is outside of it as well,
+# a call may hand back any container it was given
+def borrows(namespace: Namespace, value: AnyOperand, region: Region) -> bool:
+    if type(value) is Name:
+        return outside(namespace, value, region)
+    elif type(value) is Item:
+        return borrows(namespace, value.head, region)
+    elif type(value) is Call:
+        return any(mutable(hint) and borrows(namespace, arg, region) for arg, hint in zip(value.args, value.signature))
+    
+    return False
+
+# an arena value outlives a region when it is stored into a variable declared outside of it,
+# handed to a call together with an object from outside of it that could keep it, or when an
+# outside container goes to a function that may keep arena values in it (see Def.keeps);
+# regions tracking an element also follow what may alias it, to tell if it outlives the iteration
+def escapes(namespace: Namespace, stored: Name=None, value: AnyOperand=None, args: tuple[AnyOperand]=(), hints: tuple[Name]=(), function: Def=None):
+    objects = [(arg, hint) for arg, hint in zip(args, hints) if not scalar(hint)]
+    
+    for region in namespace.regions:
+        if stored is not None:
+            leaks = outside(namespace, stored, region)
+        else:
+            kept = [arg for arg, hint in objects if type(arg) is Name and outside(namespace, arg, region) and (len(objects) > 1 or mutable(hint) and function.keeps)]
+            leaks = len(kept) > 0
+        
+        region.escapes = region.escapes or leaks
+        
+        if region.aliases is None:
+            continue
+        # the element itself being reassigned in the body, the loop head stores it as well
+        elif stored is not None and stored is not region.node.name and stored.value == region.node.name.value:
+            region.shared = True
+        elif aliased(region, value) or any(aliased(region, arg) for arg, hint in objects):
+            if leaks:
+                region.shared = True
+            elif stored is not None:
+                region.aliases.add(stored.value)
+    
+    return
+
+def resolve_call(namespace: Namespace, call: Call, signature: tuple[Name]) -> Def:
+    if (functions := namespace.functions.get(call.name)) is None:
+        raise NameError(f'there is no function named `{call.name.value}`')
+    
+    if signature not in functions:
+        raise TypeError(f'function with signature `{call.name.value}({", ".join(sign.value for sign in signature)})` does not exists')
+    
+    return functions[signature]
+
+def infer_expression(namespace: Namespace, operand: AnyOperand) -> Name:
+    if type(operand) is Name:
+        if (variable := namespace.variables.lookup(operand)) is not None:
+            return variable.hint
+        
+        return operand.hint
+    
+    elif type(operand) is Literal:
+        return operand.hint
+    
+    elif type(operand) is List:
+        hints = [infer_expression(namespace, item) for item in operand.items]
+        
+        # an empty literal takes its element type from the annotation of what it is assigned to
+        if hints:
+            operand.hint = hints[0]
+        elif operand.hint is None:
+            raise TypeError('an empty list needs a type annotation')
+        
+        return Name(f'list__{resolve_type(operand.hint).value}__', Name('type'))
+    
+    elif type(operand) is Dict:
+        keys = [infer_expression(namespace, key) for key in operand.keys]
+        values = [infer_expression(namespace, value) for value in operand.values]
+        
+        if keys:
+            operand.hint = Item(Name('dict'), (keys[0], values[0]))
+        elif operand.hint is None:
+            raise TypeError('an empty dict needs a type annotation')
+        
+        return operand.hint
+    
+    elif type(operand) is Item:
+        hint = infer_expression(namespace, operand.head)
+        operand.container = resolve_type(hint)
+        infer_expression(namespace, operand.indice)
+        
+        if operand.container == 'str':
+            return Name('char', Name('type'))
+        elif type(hint) is Item and hint.head == 'dict':
+            return hint.indices[1]
+        
+        return element_type(operand.container) or operand.container
+    
+    elif type(operand) is Call:
+        # `xs.append(x)` on a value is a call to the method of its type, `list__int__.append(xs, x)`,
+        # a name that is not a variable is a type, as in `int.__str__(x)`
+        if type(operand.head) is Attribute and len(operand.head.body) == 1 and (type(operand.head.head) is not Name or operand.head.head in namespace.variables):
+            if (hint := infer_expression(namespace, operand.head.head)) is None:
+                raise TypeError(f'can not call method `{operand.head.body[0].value}` on {operand.head.head}, its type is unknown')
+            
+            operand.args = (operand.head.head, *operand.args)
+            operand.head = Name(f'{resolve_type(hint).value}.{operand.head.body[0].value}')
+        
+        operand.signature = signature = tuple(resolve_type(infer_expression(namespace, arg)) for arg in operand.args)
+        operand.function = resolve_call(namespace, operand, signature)
+        
+        allocates(namespace)
+        escapes(namespace, args=operand.args, hints=signature, function=operand.function)
+        
+        if operand.name == 'str':
+            operand.hint = Name('str', Name('type'))
+        else:
+            operand.hint = operand.function.rethint
+        
+        return operand.hint
+    
+    elif type(operand) is BinaryOperation:
+        leaf, operations = spine(operand)
+        left = infer_expression(namespace, leaf)
+        
+        for operation in operations:
+            right = infer_expression(namespace, operation.right)
+            operation.operands = left or right
+            
+            if operation.operator in COMPARISONS:
+                operation.inferred = Name('bool', Name('type'))
+            else:
+                operation.inferred = operation.operands
+            
+            if resolve_type(left).value == 'str' or resolve_type(right).value == 'str':
+                allocates(namespace)
+            
+            left = operation.inferred
+        
+        return left
+    
+    elif type(operand) is Attribute:
+        raise NotImplementedError
+    
+    return operand.hint
+
+def infer_body(namespace: Namespace, body: Body):
+    for ast in body.lines:
+        if type(ast) is Attribute:
+            raise NotImplementedError
+        
+        elif type(ast) is Comment:
+            # emitted code is opaque, anything it allocates may be kept
+            if ast.value.startswith('emit '):
+                for region in namespace.regions:
+                    region.escapes = True
+                    region.shared = True
+        
+        elif type(ast) is Return:
+            infer_expression(namespace, ast.operand)
+            
+            for region in namespace.regions:
+                if region.aliases is not None and aliased(region, ast.operand):
+                    region.shared = True
+        elif type(ast) is Call:
+            infer_expression(namespace, ast)
+        
+        elif type(ast) is Set:
+            variable = namespace.variables.lookup(ast.name)
+            
+            if type(ast.value) is List and not ast.value.items:
+                ast.value.hint = element_type(ast.name.hint or (variable and variable.hint))
+            elif type(ast.value) is Dict and not ast.value.keys:
+                ast.value.hint = ast.name.hint or (variable and variable.hint)
+            
+            hint = infer_expression(namespace, ast.value)
+            
+            if ast.name.hint is None and variable is not None:
+                ast.name.hint = variable.hint
+            
+            if ast.name.hint is None:
+                ast.name.hint = hint
+            
+            if variable is not None and ast.name.hint != variable.hint:
+                raise TypeError(f'variable `{variable.value}` is of type `{variable.hint.value}`, but a `{ast.name.hint.value}` was provided')
+            
+            ast.declaration = variable is None
+            
+            if ast.declaration:
+                namespace.variables.define(ast.name)
+            
+            # `+=` on a str stores a fresh concatenation, never the operand itself
+            if not scalar(ast.name.hint):
+                escapes(namespace, stored=ast.name, value=ast.value if ast.token is Token.Equal else None)
+            
+            if mutable(ast.name.hint):
+                for region in namespace.regions:
+                    if borrows(namespace, ast.value, region):
+                        region.borrowed.add(ast.name.value)
+        
+        elif type(ast) is Else:
+            infer_body(namespace.child(), ast.body)
+        
+        elif type(ast) is For:
+            hint = infer_expression(namespace, ast.operand)
+            ast.iterable = resolve_type(hint)
+            block = namespace.child()
+            
+            if ast.name not in namespace.variables:
+                if ast.iterable == 'str_iterator_p':
+                    ast.name.hint = Name('str', Name('type'))
+                elif ast.iterable == 'str':
+                    ast.name.hint = Name('char', Name('type'))
+                else:
+                    ast.name.hint = element_type(hint) or Name('int', Name('type'))
+                
+                block.variables.define(ast.name)
+            
+            infer_region(block, ast)
+        
+        elif type(ast) is While:
+            infer_region(namespace.child(), ast)
+        
+        elif type(ast) in (If, Elif):
+            infer_expression(namespace, ast.operand)
+            infer_body(namespace.child(), ast.body)
+    
+    return
+
+def infer_region(namespace: Namespace, ast: Def | While):
+    # iter() over a str walks it in place, the element lives in a stack buffer unless it outlives the iteration
+    walks = type(ast) is For and type(ast.operand) is Call and ast.operand.name.value in ('iter', 'str.__iter__') and ast.operand.signature == (Name('str'),)
+    namespace.regions.append(region := Region(ast, namespace.variables, {ast.name.value} if walks else None))
+    
+    if type(ast) is While:
+        infer_expression(namespace, ast.operand)
+    
+    elif type(ast) is For and not scalar(namespace.variables.lookup(ast.name).hint):
+        escapes(namespace, stored=ast.name, value=ast.name)
+    
+    infer_body(namespace, ast.body)
+    
+    if walks and not region.shared:
+        ast.iterable = Name('str_iterator', Name('type'))
+        ast.operand = ast.operand.args[0]
+    elif type(ast) is For and ast.iterable == 'str_iterator_p':
+        allocates(namespace)
+    
+    namespace.regions.pop()
+    
+    # a function whose region nothing escapes from keeps none of its arguments around
+    if type(ast) is Def:
+        ast.keeps = region.escapes
+    
+    ast.region = region.allocates and not region.escapes
+    return
+
+def infer_def(namespace: Namespace, ast: Def, prefix: Name=None):
+    if prefix:
+        ast.name = Name(resolve_type(prefix).value + '.' + ast.name.value, ast.name or ast.rethint)
+    
+    signature = tuple(resolve_type(sign) for sign in ast.signature)
+    
+    if ast.name in namespace.functions:
+        ast.symbol = f'{ast.name.value.replace(".", "__")}_{"_".join(resolve_type(arg.hint).value for arg in ast.args)}{"_" + ast.name.hint.value if ast.name.hint else ""}'
+        namespace.functions[ast.name][signature] = function = Def(Name(ast.symbol), ast.args, ast.body, ast.rethint)
+    else:
+        ast.symbol = ast.name.value.replace('.', '__')
+        namespace.functions[ast.name] = {signature: (function := ast)}
+    
+    local_namespace = Namespace(namespace.variables.child(), namespace.functions, namespace.prototypes)
+    
+    for arg in ast.args:
+        local_namespace.variables.define(arg)
+    
+    # the entry point is left alone, everything is released on exit anyway
+    if ast.name.value != 'main' and scalar(ast.rethint or Name('void')):
+        infer_region(local_namespace.child(), ast)
+    else:
+        infer_body(local_namespace.child(), ast.body)
+    
+    function.keeps = ast.keeps
+    return
+
+def infer(namespace: Namespace, ast):
+    if type(ast) is Def:
+        infer_def(namespace, ast)
+    
+    elif type(ast) is Class:
+        for line in ast.body.lines:
+            if type(line) is Def:
+                infer_def(namespace, line, prefix=ast.name)
+    
+    return
+
+def infer_module(namespace: Namespace, module: list):
+    for ast in module:
+        infer(namespace, ast)
+    
+    return
@@ -0,0 +1,204 @@
+import re
+
+from .tokenizer import Keyword, Literal, Comment, Name, Token
+from .parser import BinaryOperation, Call, Class, Def, Body, Item, Return, Set, List, Dict, AnyOperand
+from .parser import spine
+from .parser import If, Elif, Else, While, For
+
+INT_MIN=    -2 ** 31
+INT_MAX=    2 ** 31 -1
+
+# a trailing `\x..` or octal escape would swallow the leading digits of the next literal
+OPEN_ESCAPE = re.compile(r'(?<!\\)(?:\\\\)*\\(?:x[0-9A-Fa-f]*|[0-7]{1,2})$')
+
+def constant(operand: AnyOperand):
+    if type(operand) is Literal and not operand.fstring:
+        return operand
+    elif type(operand) is Name and operand.hint is None and operand.value in ('True', 'False'):
+        return Literal(operand.value == 'True')
+    
+    return None
+
+def divide(left: int, right: int) -> int:
+    quotient = abs(left) // abs(right)
+    
+    return quotient if (left < 0) == (right < 0) else -quotient
+
+def fold_literals(operator: Token, left, right):
+    if type(left) is str and type(right) is str:
+        if operator is Token.Plus and not (right[:1].isalnum() and OPEN_ESCAPE.search(left)):
+            return left + right
+        
+        return None
+    
+    if type(left) is not type(right) or type(left) not in (int, float):
+        return None
+    
+    if operator is Token.Plus:
+        value = left + right
+    elif operator is Token.Minus:
+        value = left - right
+    elif operator is Token.Star:
+        value = left * right
+    elif operator is Token.Slash and right:
+        value = divide(left, right) if type(left) is int else left / right
+    elif operator is Token.Percent and right and type(left) is int:
+        value = left - right * divide(left, right)
+    elif operator is Token.EqualEqual:
+        return left == right
+    elif operator is Token.NotEqual:
+        return left != right
+    elif operator is Token.LessThan:
+        return left < right
+    elif operator is Token.GreaterThan:
+        return left > right
+    elif operator is Token.LessThanEqual:
+        return left <= right
+    elif operator is Token.GreaterThanEqual:
+        return left >= right
+    else:
+        return None
+    
+    if type(value) is int and not INT_MIN <= value <= INT_MAX:
+        return None
+    elif type(value) is float and value - value != 0:
+        return None
+    
+    return value
+
+def fold_binary(operation: BinaryOperation) -> AnyOperand:
+    left = constant(operation.left)
+    right = constant(operation.right)
+    
+    if left is not None and right is not None:
+        if (value := fold_literals(operation.operator, left.value, right.value)) is not None:
+            return Literal(value)
+    
+    # ("..." + x + "a") + "b" folds the suffix into ("..." + x) + "ab"
+    elif right is not None and type(right.value) is str and operation.operator is Token.Plus:
+        inner = operation.left
+        
+        if type(inner) is BinaryOperation and inner.operator is Token.Plus and (suffix := constant(inner.right)) is not None and type(suffix.value) is str:
+            if (value := fold_literals(Token.Plus, suffix.value, right.value)) is not None:
+                operation.left = inner.left
+                operation.right = Literal(value)
+    
+    return operation
+
+def fold_expression(operand: AnyOperand) -> AnyOperand:
+    if type(operand) is BinaryOperation:
+        operand, operations = spine(operand)
+        operand = fold_expression(operand)
+        
+        for operation in operations:
+            operation.left = operand
+            operation.right = fold_expression(operation.right)
+            operand = fold_binary(operation)
+        
+        return operand
+    
+    elif type(operand) is Call:
+        operand.args = tuple(fold_expression(arg) for arg in operand.args)
+    elif type(operand) is List:
+        operand.items = tuple(fold_expression(item) for item in operand.items)
+    elif type(operand) is Dict:
+        operand.keys = tuple(fold_expression(key) for key in operand.keys)
+        operand.values = tuple(fold_expression(value) for value in operand.values)
+    elif type(operand) is Item:
+        operand.head = fold_expression(operand.head)
+        operand.indice = fold_expression(operand.indice)
+    
+    return operand
+
+def truth(operand: AnyOperand):
+    if (literal := constant(operand)) is None:
+        return None
+    
+    return bool(literal.value)
+
+def optimize_branches(arms: list[If]) -> list:
+    lines = []
+    
+    for arm in arms:
+        if type(arm) is Else:
+            value = True
+        elif (value := truth(arm.operand)) is False:
+            continue
+        
+        if value:
+            if lines:
+                lines.append(Else(arm.body))
+            else:
+                lines.extend(arm.body.lines)
+            
+            break
+        
+        lines.append(Elif(arm.operand, arm.body) if lines else If(arm.operand, arm.body))
+    
+    return lines
+
+def terminates(ast) -> bool:
+    return type(ast) is Return or ast is Keyword.Break or ast is Keyword.Continue
+
+def optimize_body(body: Body) -> Body:
+    lines = []
+    arms = []
+    unreachable = False
+    
+    for ast in (*body.lines, None):
+        if type(ast) in (If, Elif, Else, While, For):
+            if type(ast) is not Else:
+                ast.operand = fold_expression(ast.operand)
+            
+            ast.body = optimize_body(ast.body)
+            
+            if type(ast) in (Elif, Else) and arms:
+                arms.append(ast)
+                continue
+        
+        if arms:
+            lines.extend(branches := optimize_branches(arms))
+            unreachable = unreachable or any(terminates(line) for line in branches)
+            arms = []
+        
+        if ast is None:
+            break
+        elif unreachable:
+            if type(ast) is Comment:
+                lines.append(ast)
+            
+            continue
+        
+        if type(ast) is If:
+            arms.append(ast)
+            continue
+        elif type(ast) is While and truth(ast.operand) is False:
+            continue
+        
+        elif type(ast) is Return:
+            ast.operand = fold_expression(ast.operand)
+        elif type(ast) is Set:
+            ast.value = fold_expression(ast.value)
+        elif type(ast) in (Call, BinaryOperation, Item, List, Dict):
+            ast = fold_expression(ast)
+        
+        lines.append(ast)
+        unreachable = terminates(ast)
+    
+    return Body(tuple(lines))
+
+def optimize(ast):
+    if type(ast) is Def:
+        ast.body = optimize_body(ast.body)
+    
+    elif type(ast) is Class:
+        for line in ast.body.lines:
+            optimize(line)
+    
+    return
+
+def optimize_module(module: list):
+    for ast in module:
+        optimize(ast)
+    
+    return
@@ -1,28 +1,37 @@
-from .tokenizer import Indent, TokenHook
+from .tokenizer import Indent, TokenHook, tokenize
 from .tokenizer import Token, Keyword, Name, Literal, Comment
 
 class Body:
+    __slots__ = ('lines',)
+
     def __init__(self, lines: tuple["AnyAst"]):
         self.lines = lines
     
     def __repr__(self):
-        return f'Body({self.lines})'
+        return f'Body({list(self.lines)})'
 
 class Def:
+    __slots__ = ('name', 'args', 'body', 'rethint', 'symbol', 'region', 'keeps')
+
     def __init__(self, name: Name, args: tuple[Name], body: Body, rethint: Name=None):
         self.name = name
         self.args = args
         self.body = body
         self.rethint = rethint
+        self.symbol = None
+        self.region = None
+        self.keeps = True
     
     def __repr__(self):
-        return f'Def({self.name}, {self.args}, {self.body})'
+        return f'Def({self.name}, {list(self.args)}, {self.body})'
     
     @property
     def signature(self):
         return tuple(arg.hint for arg in self.args)
 
 class Class:
+    __slots__ = ('name', 'body')
+
     def __init__(self, name: Name, body: Body):
         self.name = name
         self.body = body
@@ -31,13 +40,17 @@ class Class:
         return f'Class({self.name}, {self.body})'
 
 class Call:
+    __slots__ = ('head', 'args', 'hint', 'function', 'signature')
+
     def __init__(self, head: "AnyOperand", args: tuple["AnyOperand"], hint=None):
         self.head = head
         self.args = args
         self.hint = hint
+        self.function = None
+        self.signature = None
     
     def __repr__(self):
-        return f'Call({self.name}, {self.args})'
+        return f'Call({self.name}, {list(self.args)})'
     
     @property
     def name(self):
@@ -46,36 +59,81 @@ class Call:
         
         return self.head.name
 
+COMPARISONS = (Token.EqualEqual, Token.NotEqual, Token.LessThan, Token.GreaterThan, Token.LessThanEqual, Token.GreaterThanEqual)
+
 class BinaryOperation:
+    __slots__ = ('operator', 'left', 'right', 'inferred', 'operands')
+
     def __init__(self, operator: Token, left: "AnyOperand", right: "AnyOperand"):
         self.operator = operator
         self.left = left
         self.right = right
+        self.inferred = None
+        self.operands = None
     
     def __repr__(self):
         return f'BinaryOperation({self.operator}, {self.left}, {self.right})'
+    
+    # copies and pickles rebuild the chain from its spine
+    def __reduce__(self):
+        leaf, operations = spine(self)
+
+        return (rebuild_spine, (leaf, [(operation.operator, operation.right, operation.inferred, operation.operands) for operation in operations]))
 
     @property
     def hint(self):
-        if self.operator in (Token.EqualEqual, Token.NotEqual, Token.LessThan, Token.GreaterThan):
-            return Name('bool', hint=Name('type'))
-
-        if hint := self.left.hint:
-            return hint
+        leaf, operations = spine(self)
+        hint = leaf.hint
+
+        for operation in operations:
+            if operation.operator in COMPARISONS:
+                hint = Name('bool', hint=Name('type'))
+            elif not hint:
+                hint = operation.right.hint
         
-        return self.right.hint
+        return hint
     
     @hint.setter
     def hint(self, value: Name):
-        if self.hint is None:
-            self.left.hint = value
-            self.right.hint = value
+        if self.hint is not None:
+            return
+        
+        leaf, operations = spine(self)
+
+        for operation in operations:
+            operation.right.hint = value
         
+        leaf.hint = value
+
         return
 
+# long chains nest to the left, walking down their left operands instead of recursing keeps a
+# chain of thousands of operations off the python stack; gives the innermost left operand and the
+# operations in the order they apply to it, `until` stops the walk at an operation it accepts
+def spine(operand: "AnyOperand", until=None) -> tuple["AnyOperand", list[BinaryOperation]]:
+    operations = []
+
+    while type(operand) is BinaryOperation and not (until and until(operand)):
+        operations.append(operand)
+        operand = operand.left
+    
+    operations.reverse()
+
+    return operand, operations
+
+def rebuild_spine(operand: "AnyOperand", spine: list[tuple]) -> BinaryOperation:
+    for operator, right, inferred, operands in spine:
+        operand = BinaryOperation(operator, operand, right)
+        operand.inferred = inferred
+        operand.operands = operands
+    
+    return operand
+
 AnyOperand = BinaryOperation | Name | Literal
 
 class Import:
+    __slots__ = ('module', 'names')
+
     def __init__(self, module: Name, names: tuple[Name]):
         self.module = module
         self.names = names
@@ -84,6 +142,8 @@ class Import:
         return f'Import({self.module}, {self.names})'
 
 class Return:
+    __slots__ = ('operand',)
+
     def __init__(self, operand: AnyOperand):
         self.operand = operand
     
@@ -91,6 +151,8 @@ class Return:
         return f'Return({self.operand})'
 
 class If:
+    __slots__ = ('operand', 'body')
+
     def __init__(self, operand: AnyOperand, body: Body):
         self.operand = operand
         self.body = body
@@ -99,10 +161,14 @@ class If:
         return f'If({self.operand}, {self.body})'
 
 class Elif(If):
+    __slots__ = ()
+
     def __repr__(self):
         return f'Else({self.operand}, {self.body})'
 
 class Else(If):
+    __slots__ = ()
+
     def __init__(self, body: Body):
         self.body = body
 
@@ -110,66 +176,102 @@ class Else(If):
         return f'Else({self.body})'
 
 class While(If):
+    __slots__ = ('region',)
+
+    def __init__(self, operand: AnyOperand, body: Body):
+        self.operand = operand
+        self.body = body
+        self.region = None
+
     def __repr__(self):
         return f'While({self.operand}, {self.body})'
 
 class For(While):
+    __slots__ = ('name', 'iterable')
+
     def __init__(self, name: Name, operand: AnyOperand, body: Body):
         self.name = name
         self.operand = operand
         self.body = body
+        self.iterable = None
+        self.region = None
 
     def __repr__(self):
         return f'For({self.name}, {self.operand}, {self.body})'
 
 class Item:
+    __slots__ = ('head', 'indice', 'container')
+
     def __init__(self, head: AnyOperand, indice: AnyOperand):
         self.head = head
         self.indice = indice
+        self.container = None
     
     def __repr__(self):
         return f'Item({self.head}, {self.indice})'
     
     @property
     def hint(self):
-        if self.head == 'list':
-            return Name(f'{self.head.value}__{self.indice.value}__')
+        if self.head == 'list' or self.head == 'dict':
+            return Name(f'{self.head.value}__{"__".join(indice.value for indice in self.indices)}__')
 
         return self.head.hint
+    
+    @property
+    def indices(self) -> tuple[AnyOperand]:
+        return self.indice if type(self.indice) is tuple else (self.indice,)
 
 class List:
-    def __init__(self, items: list[AnyOperand], hint=None):
+    __slots__ = ('items', 'hint')
+
+    def __init__(self, items: tuple[AnyOperand], hint=None):
         self.items = items
         self.hint = hint
     
     def __repr__(self):
-        return f'List({self.items})'
+        return f'List({list(self.items)})'
     
     @property
     def signature(self):
         return Name(f'list__{self.hint.value}__', self.hint)
 
+class Dict:
+    __slots__ = ('keys', 'values', 'hint')
+
+    def __init__(self, keys: tuple[AnyOperand], values: tuple[AnyOperand], hint=None):
+        self.keys = keys
+        self.values = values
+        self.hint = hint
+    
+    def __repr__(self):
+        return f'Dict({list(self.keys)}, {list(self.values)})'
+
 class Attribute:
-    def __init__(self, head: AnyOperand, body: list[AnyOperand]):
+    __slots__ = ('head', 'body')
+
+    def __init__(self, head: AnyOperand, body: tuple[Name]):
         self.head = head
         self.body = body
     
     def __repr__(self):
-        return f'Attribute({self.head}, {self.body})'
+        return f'Attribute({self.head}, {list(self.body)})'
     
     @property
     def hint(self):
-        return self.body.hint
+        return self.body[-1].hint
     
     @property
     def name(self) -> Name:
         return Name(f'{self.head.value}.{".".join(name.value for name in self.body)}')
 
 class Set:
+    __slots__ = ('name', 'token', 'value', 'declaration')
+
     def __init__(self, name: Name, token: Token, value: AnyOperand):
         self.name = name
         self.token = token
         self.value = value
+        self.declaration = None
     
     def __repr__(self):
         return f'Set({self.name}, {self.token}, {self.value})'
@@ -192,16 +294,19 @@ def parse_call(hook: TokenHook, name: Name):
         elif token is not Token.Comma:
             raise SyntaxError(f'missing `,` at `{name.value}(...)`. found `{token}`')
         
-    return Call(name, args)
+    return Call(name, tuple(args))
 
 def parse_item(hook: TokenHook, head: AnyOperand) -> Item:
-    expression = parse_expression(hook, hook.take())
-    token = hook.take()
+    indices = [parse_expression(hook, hook.take())]
+
+    # `dict[str, int]` keeps its indices as a tuple
+    while (token := hook.take()) is Token.Comma:
+        indices.append(parse_expression(hook, hook.take()))
 
     if token is not Token.RightBracket:
         raise SyntaxError(f'missing `]`at {head}')
 
-    return Item(head, expression)
+    return Item(head, indices[0] if len(indices) == 1 else tuple(indices))
 
 def parse_list(hook: TokenHook) -> List:
     items = []
@@ -214,47 +319,102 @@ def parse_list(hook: TokenHook) -> List:
 
         items.append(parse_expression(hook, token))
 
-    return List(items)
+    return List(tuple(items))
+
+def parse_dict(hook: TokenHook) -> Dict:
+    keys = []
+    values = []
+
+    for token in hook:
+        if token is Token.RightBrace:
+            break
+        elif token is Token.Comma:
+            continue
+
+        keys.append(parse_expression(hook, token))
 
-def parse_attribute(hook: TokenHook, value: Name) -> AnyOperand:
+        if (token := hook.take()) is not Token.Colon:
+            raise SyntaxError(f'missing `:` after dict key {keys[-1]}, found `{token}`')
+
+        values.append(parse_expression(hook, hook.take()))
+
+    return Dict(tuple(keys), tuple(values))
+
+def parse_attribute(hook: TokenHook, value: AnyOperand) -> Attribute:
     body = []
 
     for token in hook:
-        body.append(parse_expression(hook, token, {Token.Dot}))
+        if type(token) is not Name:
+            raise SyntaxError(f'expected attribute name, found `{token}`')
+
+        body.append(token)
         token = hook.take()
         
         if token is not Token.Dot:
             hook.drop()
             break
 
-    return Attribute(value, body)
-
-def parse_expression(hook: TokenHook, value: AnyOperand, accept=set()) -> AnyOperand:
-
+    return Attribute(value, tuple(body))
+
+# operator binding powers, tighter operators bind higher
+BINDING_POWER = {
+    Token.EqualEqual:           10,
+    Token.NotEqual:             10,
+    Token.LessThan:             20,
+    Token.GreaterThan:          20,
+    Token.LessThanEqual:        20,
+    Token.GreaterThanEqual:     20,
+    Token.Plus:                 30,
+    Token.Minus:                30,
+    Token.Star:                 40,
+    Token.Slash:                40,
+    Token.Percent:              40,
+    Keyword.In:                 10,
+}
+
+AUGMENTED = {
+    Token.PlusEqual:    Token.Plus,
+    Token.MinusEqual:   Token.Minus,
+    Token.StarEqual:    Token.Star,
+    Token.SlashEqual:   Token.Slash,
+}
+
+def parse_operand(hook: TokenHook, value: AnyOperand) -> AnyOperand:
     if value is Token.LeftBracket:
-        return parse_list(hook)
-
-    if type(value) is Token or type(value) is Keyword:
+        value = parse_list(hook)
+    elif value is Token.LeftBrace:
+        value = parse_dict(hook)
+    elif type(value) is Token or type(value) is Keyword:
         raise SyntaxError(f'expected expression, found `{value}`')
     
-    token = hook.take()
+    while True:
+        token = hook.take()
 
-    if accept and token not in accept:
-        hook.drop()
-        return value
-
-    if token in (Token.Plus, Token.Minus, Token.Star, Token.Slash, Token.LessThan, Token.GreaterThan, Token.EqualEqual, Token.NotEqual):
-        return BinaryOperation(token, value, parse_expression(hook, hook.take()))
-    elif token is Token.Dot:
-        return parse_expression(hook, parse_attribute(hook, value))
-    elif token is Token.LeftParenthesis:
-        return parse_expression(hook, parse_call(hook, value))
-    elif token is Token.LeftBracket:
-        return parse_expression(hook, parse_item(hook, value))
-    else:
-        hook.drop()
-    
-    return value
+        if token is Token.Dot:
+            value = parse_attribute(hook, value)
+        elif token is Token.LeftParenthesis:
+            value = parse_call(hook, value)
+        elif token is Token.LeftBracket:
+            value = parse_item(hook, value)
+        else:
+            hook.drop()
+            return value
+
+def parse_expression(hook: TokenHook, value: AnyOperand, power=0) -> AnyOperand:
+    value = parse_operand(hook, value)
+
+    while True:
+        token = hook.take()
+
+        if type(token) not in (Token, Keyword) or BINDING_POWER.get(token, 0) <= power:
+            hook.drop()
+            return value
+        
+        # `key in container` is `container.__contains__(key)`
+        if token is Keyword.In:
+            value = Call(Attribute(parse_expression(hook, hook.take(), BINDING_POWER[token]), (Name('__contains__'),)), (value,))
+        else:
+            value = BinaryOperation(token, value, parse_expression(hook, hook.take(), BINDING_POWER[token]))
 
 def parse_body(hook: TokenHook):
     token = hook.take()
@@ -337,14 +497,28 @@ def parse_body(hook: TokenHook):
                 lines.append(Set(name, token, expression))
             else:
                 hook.drop()
-                lines.append(parse_expression(hook, name))
+                expression = parse_expression(hook, name)
+
+                # `d[k] = v` is `d.__setitem__(k, v)`, `d[k] += v` reads the item back first
+                if type(expression) is Item and ((token := hook.take()) is Token.Equal or type(token) is Token and token in AUGMENTED):
+                    value = parse_expression(hook, hook.take())
+
+                    if token is not Token.Equal:
+                        value = BinaryOperation(AUGMENTED[token], expression, value)
+                    
+                    lines.append(Call(Attribute(expression.head, (Name('__setitem__'),)), (expression.indice, value)))
+                    continue
+                elif type(expression) is Item:
+                    hook.drop()
+                
+                lines.append(expression)
         else:
             lines.append(parse_expression(hook, token))
     
     if token:
         hook.drop()
 
-    return Body(lines)
+    return Body(tuple(lines))
 
 def parse_def(hook: TokenHook):
     name = hook.take()
@@ -384,11 +558,11 @@ def parse_def(hook: TokenHook):
 
     if token is not Token.Arrow:
         hook.drop()
-        return Def(name, args, parse_body(hook))
+        return Def(name, tuple(args), parse_body(hook))
 
     rethint = parse_expression(hook, hook.take())
     
-    return Def(name, args, parse_body(hook), rethint)
+    return Def(name, tuple(args), parse_body(hook), rethint)
 
 def parse_class(hook: TokenHook) -> Class:
     name = hook.take()
@@ -441,4 +615,79 @@ def parse(hook: TokenHook):
         else:
             raise SyntaxError(f'unexpected token `{token}`')
     
-    return
\ No newline at end of file
+    return
+
+class Chunk:
+    __slots__ = ('start', 'end', 'nodes')
+
+    def __init__(self, start: int, end: int, nodes: tuple[AnyAst]):
+        self.start = start
+        self.end = end
+        self.nodes = nodes
+    
+    def __repr__(self):
+        return f'Chunk({self.start}, {self.end}, {self.nodes})'
+
+class Module:
+    __slots__ = ('source', 'chunks')
+
+    def __init__(self, source: str, chunks: list[Chunk]):
+        self.source = source
+        self.chunks = chunks
+    
+    def __repr__(self):
+        return f'Module({self.chunks})'
+    
+    @property
+    def nodes(self) -> list[AnyAst]:
+        return [node for chunk in self.chunks for node in chunk.nodes]
+
+def split_chunks(source: str, start: int, end: int) -> list[tuple[int, int]]:
+    bounds = [start]
+    line = source.find('\n', start, end)
+
+    while line >= 0 and line +1 < end:
+        if source[line +1] not in ' \t\r\n':
+            bounds.append(line +1)
+        
+        line = source.find('\n', line +1, end)
+    
+    bounds.append(end)
+
+    return [(bounds[index], bounds[index +1]) for index in range(len(bounds) -1)]
+
+def parse_chunks(source: str, start: int, end: int) -> list[Chunk]:
+    chunks = []
+
+    for start, end in split_chunks(source, start, end):
+        chunks.append(Chunk(start, end, tuple(parse(tokenize(source[start:end])))))
+
+    return chunks
+
+def parse_module(source: str) -> Module:
+    return Module(source, parse_chunks(source, 0, len(source)))
+
+def reparse(module: Module, start: int, end: int, text: str) -> Module:
+    chunks = module.chunks
+    source = module.source[:start] + text + module.source[end:]
+    delta = len(text) - (end - start)
+
+    if not chunks:
+        return parse_module(source)
+
+    first = 0
+    last = len(chunks) -1
+
+    while first < last and chunks[first].end <= start:
+        first += 1
+    
+    if first > 0 and chunks[first].start == start:
+        first -= 1
+    
+    while last > first and chunks[last].start > end:
+        last -= 1
+
+    head = chunks[:first]
+    tail = [Chunk(chunk.start + delta, chunk.end + delta, chunk.nodes) for chunk in chunks[last +1:]]
+
+    return Module(source, head + parse_chunks(source, chunks[first].start, chunks[last].end + delta) + tail)
@@ -1,13 +1,19 @@
 from functools import cache
+from array import array
 from typing import Iterator
 from enum import Enum
 
 from io import StringIO
 from io import IOBase
+from mmap import mmap, ACCESS_READ
+import os
 
 Stream = StringIO
+Source = str | bytes | memoryview | mmap
 
 class BaseIdent:
+    __slots__ = ()
+
     def __bool__(self):
         return self.value != '\0'
 
@@ -56,8 +62,28 @@ class Token(BaseIdent, Enum):
     RightParenthesis=   ')'
     LeftBracket=        '['
     RightBracket=       ']'
+    LeftBrace=          '{'
+    RightBrace=         '}'
+
+TOKENS = tuple(Token)
+
+def build_token_trie() -> dict:
+    trie = {}
+
+    for token in Token:
+        node = trie
+
+        for char in token.value:
+            if char not in node:
+                node[char] = node[ord(char)] = {}
+            
+            node = node[char]
+        
+        node[None] = TOKENS.index(token)
+    
+    return trie
 
-TOKENS_SORTED = sorted(Token, key=len, reverse=True)
+TOKEN_TRIE = build_token_trie()
 
 class Keyword(BaseIdent, Enum):
     Pass=               'pass'
@@ -75,9 +101,13 @@ class Keyword(BaseIdent, Enum):
     Break=              'break'
     Continue=           'continue'
 
-KEYWORDS_SORTED = sorted(Keyword, key=len, reverse=True)
+KEYWORDS = tuple(Keyword)
+KEYWORD_INDEX = {keyword.value: index for index, keyword in enumerate(KEYWORDS)}
+KEYWORD_INDEX.update({keyword.encode(): index for keyword, index in tuple(KEYWORD_INDEX.items())})
 
 class Name(BaseIdent):
+    __slots__ = ('value', 'hint')
+
     def __init__(self, value: str, hint: "Name"=None):
         self.value = value
         self.hint = hint
@@ -89,6 +119,8 @@ class Name(BaseIdent):
         return f'Name({self.value}, {self.hint})'
 
 class Literal(BaseIdent):
+    __slots__ = ('value', 'fstring')
+
     def __init__(self, value: str | bool | int | float, fstring=False):
         self.value = value
         self.fstring = fstring
@@ -104,6 +136,8 @@ class Literal(BaseIdent):
         return Name(type(self.value).__name__, hint=Name('type'))
 
 class Comment:
+    __slots__ = ('value',)
+
     def __init__(self, value: str):
         self.value = value
     
@@ -111,6 +145,8 @@ class Comment:
         return f'Comment({self.value})'
 
 class Indent:
+    __slots__ = ('value',)
+
     def __init__(self, value: int):
         self.value = value
     
@@ -123,147 +159,282 @@ class Indent:
 AnyToken = Keyword | Token | Name | Literal | Comment | Indent
 
 
-def drop(stream: Stream, decrement=1) -> int:
-    return stream.seek(stream.tell() - decrement)
+# character classes, looked up once per character by the lexer engine
+SPACE=          1 << 0
+TAB=            1 << 1
+NEWLINE=        1 << 2
+LOWER=          1 << 3
+UPPER=          1 << 4
+UNDERSCORE=     1 << 5
+DIGIT=          1 << 6
+HEX=            1 << 7
+BIN=            1 << 8
+QUOTE=          1 << 9
+HASH=           1 << 10
+BACKSLASH=      1 << 11
+DOT=            1 << 12
+PREFIX=         1 << 13
+HEX_MARK=       1 << 14
+BIN_MARK=       1 << 15
+
+WHITESPACE = SPACE | TAB
+NAME_START = LOWER | UPPER | UNDERSCORE
+NAME_CHAR = NAME_START | DIGIT
+NUMBER_CHAR = DIGIT | UNDERSCORE
+HEX_CHAR = HEX | UNDERSCORE
+BIN_CHAR = BIN | UNDERSCORE
+
+def build_char_classes() -> dict[str | int, int]:
+    classes = {}
+
+    def mark(chars: str, flag: int):
+        for char in chars:
+            classes[char] = classes[ord(char)] = classes.get(char, 0) | flag
+
+    mark(' ', SPACE)
+    mark('\t', TAB)
+    mark('\n', NEWLINE)
+    mark('abcdefghijklmnopqrstuvwxyz', LOWER)
+    mark('ABCDEFGHIJKLMNOPQRSTUVWXYZ', UPPER)
+    mark('_', UNDERSCORE)
+    mark('0123456789', DIGIT)
+    mark('0123456789abcdefABCDEF', HEX)
+    mark('01', BIN)
+    mark('"\'', QUOTE)
+    mark('#', HASH)
+    mark('\\', BACKSLASH)
+    mark('.', DOT)
+    mark('f', PREFIX)
+    mark('x', HEX_MARK)
+    mark('b', BIN_MARK)
+
+    return classes
+
+CHAR_CLASS = build_char_classes()
+
+
+# token kinds stored in the compact token table
+KIND_TOKEN=     0
+KIND_KEYWORD=   1
+KIND_NAME=      2
+KIND_INDENT=    3
+KIND_COMMENT=   4
+KIND_INT=       5
+KIND_FLOAT=     6
+KIND_HEX=       7
+KIND_BIN=       8
+KIND_STRING=    9
+KIND_FSTRING=   10
+
+Record = tuple[int, int, int, int | str | bytes | None]
+
+def text(source: Source, start: int, end: int, errors='strict') -> str:
+    if type(source) is str:
+        return source[start:end]
+    
+    return str(source[start:end], 'utf-8', errors)
 
-def take(stream: Stream) -> str:
-    return stream.read(1)
+def skip(source: Source, index: int, flags: int) -> int:
+    length = len(source)
 
+    while index < length and CHAR_CLASS.get(source[index], 0) & flags:
+        index += 1
+    
+    return index
 
-def scan_token(stream: Stream) -> Token:
-    position = stream.tell()
+def scan_token(source: Source, index: int) -> tuple[int, int]:
+    node = TOKEN_TRIE
+    token = None
+    length = len(source)
+    end = position = index
 
-    for token in TOKENS_SORTED:
-        chunk = stream.read(len(token))
+    while position < length and (node := node.get(source[position])) is not None:
+        position += 1
 
-        if chunk.startswith(token.value):
-            return token
-        
-        stream.seek(position)
+        if None in node:
+            token, end = node[None], position
+    
+    if token is None:
+        raise SyntaxError(f'invalid token {text(source, index, index +1, "replace")!r}')
 
-    raise SyntaxError(f'invalid token {stream.read(1)!r}')
+    return token, end
 
-def scan_name(stream: Stream, name: str) -> Name:
-    while char := take(stream):
-        if char >= 'a' and char <= 'z' or char >= 'A' and char <= 'Z':
-            name += char
-        elif char == '_' or char >= '0' and char <= '9':
-            name += char
-        else:
-            break
-    
-    if char:
-        drop(stream)
+def scan_name(source: Source, index: int) -> tuple[int, int | str | bytes, int]:
+    end = skip(source, index +1, NAME_CHAR)
+    name = source[index:end]
+
+    if type(name) is memoryview:
+        name = bytes(name)
+
+    if (keyword := KEYWORD_INDEX.get(name)) is not None:
+        return KIND_KEYWORD, keyword, end
     
-    return Name(name)
+    return KIND_NAME, name, end
 
-def scan_number(stream: Stream, value: str) -> Literal:
-    while char := take(stream):
-        if char == '_' or char >= '0' and char <= '9':
-            value += char
-        else:
-            break
+def scan_number(source: Source, index: int) -> tuple[int, int]:
+    end = skip(source, index, NUMBER_CHAR)
+
+    if end >= len(source) or not CHAR_CLASS.get(source[end], 0) & DOT:
+        return KIND_INT, end
     
-    if char != '.':
-        if char:
-            drop(stream)
+    return KIND_FLOAT, skip(source, end +1, NUMBER_CHAR)
+
+def scan_string(source: Source, index: int) -> int:
+    quote = source[index]
+    length = len(source)
+    index += 1
+
+    while index < length:
+        char = source[index]
+
+        if char == quote:
+            return index +1
         
-        return Literal(int(value))
-    
-    value += char
-    
-    while char := take(stream):
-        if char == '_' or char >= '0' and char <= '9':
-            value += char
-        else:
-            break
-    
-    if char:
-        drop(stream)
-    
-    return Literal(float(value))
-
-def scan_hex_number(stream: Stream, value: str) -> Literal:
-    while char := take(stream):
-        if char >= '0' and char <= '9' or char >= 'a' and char <= 'f':
-            value += char
-        elif char == '_' or char >= 'A' and char <= 'f':
-            value += char
-        else:
-            break
+        index += 2 if CHAR_CLASS.get(char, 0) & BACKSLASH else 1
     
-    if char:
-        drop(stream)
-    
-    return Literal(int(value, 16))
+    return length
 
-def scan_bin_number(stream: Stream, value: str) -> Literal:
-    while char := take(stream):
-        if char == '_' or char == '0' or char == '1':
-            value += char
-        else:
-            break
-    
-    if char:
-        drop(stream)
+def scan_comment(source: Source, index: int) -> int:
+    if type(source) is memoryview:
+        length = len(source)
+
+        while index < length and not CHAR_CLASS.get(source[index], 0) & NEWLINE:
+            index += 1
+        
+        return index
+
+    end = source.find('\n' if type(source) is str else b'\n', index)
+
+    return len(source) if end < 0 else end
+
+def scan_indent(source: Source, index: int) -> tuple[int, int]:
+    end = skip(source, index, SPACE)
+
+    if end < len(source) and CHAR_CLASS.get(source[end], 0) & NEWLINE:
+        return 0, end
     
-    return Literal(int(value, 2))
+    return end - index, end
 
-def scan_string(stream: Stream, quote: str) -> Literal:
-    value = str()
+def scan(source: Source, index=0) -> Iterator[Record]:
+    length = len(source)
 
-    while char := take(stream):
-        if char == quote:
-            break
-        
-        if char == '\\':
-            char = take(stream)
+    while index < length:
+        char = source[index]
+        flags = CHAR_CLASS.get(char, 0)
+        start = index
+        value = None
 
-            if char == quote:
-                value += char
+        if flags & WHITESPACE:
+            index += 1
+            continue
+        
+        if flags & NEWLINE:
+            kind = KIND_INDENT
+            value, index = scan_indent(source, index +1)
+        elif flags & QUOTE:
+            kind = KIND_STRING
+            index = scan_string(source, index)
+        elif flags & PREFIX and index +1 < length and CHAR_CLASS.get(source[index +1], 0) & QUOTE:
+            kind = KIND_FSTRING
+            index = scan_string(source, index +1)
+        elif flags & NAME_START:
+            kind, value, index = scan_name(source, index)
+        elif flags & DIGIT:
+            fmt = CHAR_CLASS.get(source[index +1], 0) if index +1 < length else 0
+
+            if fmt & HEX_MARK:
+                kind = KIND_HEX
+                index = skip(source, index +3, HEX_CHAR)
+            elif fmt & BIN_MARK:
+                kind = KIND_BIN
+                index = skip(source, index +3, BIN_CHAR)
             else:
-                value += '\\' + char
+                kind, index = scan_number(source, index)
+        
+        elif flags & HASH:
+            kind = KIND_COMMENT
+            index = scan_comment(source, index)
         else:
-            value += char
+            kind = KIND_TOKEN
+            value, index = scan_token(source, index)
+        
+        yield kind, start, index, value
     
-    return Literal(value)
+    return
 
-def scan_comment(stream: Stream) -> Comment:
-    value = str()
 
-    while char := take(stream):
-        if char == '\n':
-            break
-        else:
-            value += char 
-    
-    if char:
-        drop(stream)
-    
-    return Comment(value.strip())
+def decode_string(source: Source, start: int, end: int) -> str:
+    quote = source[start]
+    chunks = []
+    index = start = start +1
 
-def scan_indent(stream: Stream) -> Indent:
-    value = 0
+    while index < end:
+        char = source[index]
 
-    while char := take(stream):
-        if char == ' ':
-            value += 1
-        else:
+        if char == quote:
             break
+        
+        if CHAR_CLASS.get(char, 0) & BACKSLASH:
+            if index +1 < end and source[index +1] == quote:
+                chunks.append(text(source, start, index))
+                start = index +1
+            
+            index += 2
+        else:
+            index += 1
     
-    if char:
-        drop(stream)
-    
-    if char == '\n':
-        return Indent(0)
-    
-    return Indent(value)
-
+    chunks.append(text(source, start, min(index, end)))
+
+    return ''.join(chunks)
+
+def materialize(source: Source, kind: int, start: int, end: int, value: int | str | bytes | None) -> AnyToken:
+    if kind == KIND_TOKEN:
+        return TOKENS[value]
+    elif kind == KIND_NAME:
+        return Name(value if type(value) is str else value.decode())
+    elif kind == KIND_KEYWORD:
+        return KEYWORDS[value]
+    elif kind == KIND_INDENT:
+        return Indent(value)
+    elif kind == KIND_STRING:
+        return Literal(decode_string(source, start, end))
+    elif kind == KIND_FSTRING:
+        return Literal(decode_string(source, start +1, end), fstring=True)
+    elif kind == KIND_INT:
+        return Literal(int(text(source, start, end)))
+    elif kind == KIND_FLOAT:
+        return Literal(float(text(source, start, end)))
+    elif kind == KIND_HEX:
+        return Literal(int(text(source, start +2, end), 16))
+    elif kind == KIND_BIN:
+        return Literal(int(text(source, start +2, end), 2))
+    elif kind == KIND_COMMENT:
+        return Comment(text(source, start +1, end).strip())
+
+    raise ValueError(f'unknown token kind {kind}')
+
+# how many already taken tokens TokenHook keeps around for drop()
+LOOKAHEAD = 8
+
+# record columns, kinds are bytes, spans and values unsigned ints, names are indices into the intern table
+COLUMNS = ('B', 'I', 'I', 'I')
+
+EOF_RECORD = (KIND_TOKEN, TOKENS.index(Token.Eof))
+
+# taken tokens are kept as records in typed columns, a ring of the last few and a history while marked;
+# a token only becomes a python object when it is taken, equal names share one interned string
 class TokenHook:
-    def __init__(self, iterator: Iterator[AnyToken], position=0):
-        self.iterator = iterator
+    def __init__(self, source: Source, position=0, window=LOOKAHEAD):
+        self.source = source
+        self.records = scan(source)
         self.position = position
-        self.cache = []
+        self.filled = position
+        self.window = window
+        self.buffer = tuple(array(code, bytes(array(code).itemsize * window)) for code in COLUMNS)
+        self.history = tuple(array(code) for code in COLUMNS)
+        self.names = []
+        self.name_ids = {}
+        self.marks = []
     
     def __iter__(self):
         try:
@@ -275,79 +446,131 @@ class TokenHook:
         
         yield Token.Eof
     
+    @property
+    def base(self) -> int:
+        return self.filled - len(self.history[0])
+    
+    def retained(self, position: int) -> bool:
+        return position >= 0 and (self.filled - position <= self.window or position >= self.base)
+    
+    def intern(self, name: str | bytes) -> int:
+        if (index := self.name_ids.get(name)) is None:
+            index = self.name_ids[name] = len(self.names)
+            self.names.append(name if type(name) is str else name.decode())
+        
+        return index
+    
+    def load(self, columns: tuple[array], index: int) -> AnyToken:
+        kinds, starts, ends, values = columns
+
+        return self.materialize(kinds[index], starts[index], ends[index], values[index])
+    
+    def materialize(self, kind: int, start: int, end: int, value: int) -> AnyToken:
+        if kind == KIND_NAME:
+            return Name(self.names[value])
+        elif kind == KIND_TOKEN:
+            return TOKENS[value]
+        
+        return materialize(self.source, kind, start, end, value)
+    
     def take(self) -> AnyToken:
-        if self.position < len(self.cache):
-            token = self.cache[self.position]
-            self.position += 1
+        position = self.position
 
-            return token
+        if position < self.filled:
+            if self.filled - position <= self.window:
+                token = self.load(self.buffer, position % self.window)
+            else:
+                token = self.load(self.history, position - self.base)
+        else:
+            if self.records is None:
+                raise StopIteration
+            
+            if (record := next(self.records, None)) is None:
+                self.records = None
+                record = EOF_RECORD[0], len(self.source), len(self.source), EOF_RECORD[1]
+            
+            kind, start, end, value = record
+
+            if kind == KIND_NAME:
+                name = value
+                
+                if (value := self.name_ids.get(name)) is None:
+                    value = self.intern(name)
+                
+                token = Name(self.names[value])
+            elif kind == KIND_TOKEN:
+                token = TOKENS[value]
+            else:
+                token = materialize(self.source, kind, start, end, value)
+                value = value or 0
+            
+            kinds, starts, ends, values = self.buffer
+            slot = position % self.window
+            kinds[slot] = kind
+            starts[slot] = start
+            ends[slot] = end
+            values[slot] = value
+            self.filled += 1
+
+            if self.marks:
+                for column, field in zip(self.history, (kind, start, end, value)):
+                    column.append(field)
+            elif self.history[0]:
+                self.history = tuple(array(code) for code in COLUMNS)
         
-        token = next(self.iterator)
-        self.cache.append(token)
         self.position += 1
 
         return token
     
     def drop(self):
+        if not self.retained(self.position -1):
+            raise IndexError(f'cannot drop more than {self.window} tokens without a mark')
+
         self.position -= 1
 
         return
+    
+    def mark(self) -> int:
+        if self.position < (base := self.base):
+            for column, history in zip(self.buffer, self.history):
+                history[:0] = array(column.typecode, (column[position % self.window] for position in range(self.position, base)))
+        
+        self.marks.append(self.position)
 
-def tokenize(stream: Stream) -> TokenHook:
-    def iterator() -> Iterator[AnyToken]:
-        while char := take(stream):
-            if char == ' ' or char == '\t':
-                continue
-            
-            if char == '\n':
-                yield scan_indent(stream)
-            
-            elif char == 'f':
-                pref = take(stream)
+        return self.position
+    
+    def release(self, mark: int):
+        self.marks.remove(mark)
+        keep = min(self.marks, default=self.position)
 
-                if pref == '"' or pref == "'":
-                    yield Literal(scan_string(stream, pref).value, fstring=True)
-                else:
-                    drop(stream)
+        if not self.marks and self.filled - self.position <= self.window:
+            self.history = tuple(array(code) for code in COLUMNS)
+        elif (keep := min(keep, self.position)) > (base := self.base):
+            for column in self.history:
+                del column[:keep - base]
 
-                    name = scan_name(stream, char)
+        return
+    
+    def rewind(self, mark: int):
+        self.position = mark
+        self.release(mark)
 
-                    if name in KEYWORDS_SORTED:
-                        yield Keyword(name)
-                    else:
-                        yield name
-            
-            elif char >= 'a' and char <= 'z':
-                name = scan_name(stream, char)
+        return
 
-                if name in KEYWORDS_SORTED:
-                    yield Keyword(name)
-                else:
-                    yield name
-            
-            elif char == '_' or char >= 'A' and char <= 'Z':
-                yield scan_name(stream, char)
-            elif char >= '0' and char <= '9':
-                fmt = take(stream)
-
-                if fmt == 'x':
-                    yield scan_hex_number(stream, take(stream))
-                elif fmt == 'b':
-                    yield scan_bin_number(stream, take(stream))
-                else:
-                    if fmt:
-                        drop(stream)
-
-                    yield scan_number(stream, char)
-
-            elif char == '"' or char == "'":
-                yield scan_string(stream, char)
-            elif char == '#':
-                yield scan_comment(stream)
-            else:
-                drop(stream)
-                yield scan_token(stream)
-        
-        yield Token.Eof
+def read_source(source: Source | Stream) -> Source:
+    if isinstance(source, (str, bytes, mmap)):
+        return source
+    elif isinstance(source, (bytearray, memoryview)):
+        return memoryview(source).cast('B')
     
-    return TokenHook(iterator())
+    return source.read()
+
+def map_source(name: str) -> bytes | mmap:
+    with open(name, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return bytes()
+        
+        return mmap(file.fileno(), 0, access=ACCESS_READ)
+
+def tokenize(source: Source | Stream) -> TokenHook:
+    return TokenHook(read_source(source))
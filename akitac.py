@@ -1,9 +1,11 @@
 #!/usr/bin/python3
 
 from argparse import ArgumentParser
+from subprocess import CalledProcessError
+import shlex
 import os
 
-from akita import compiler
+from akita import build
 
 # os specific stuff
 if os.name == 'posix':
@@ -12,21 +14,47 @@ else:
     EXECUTABLE_SUFIX= 'exe'
 
 argparser = ArgumentParser()
-argparser.add_argument('file')
+argparser.add_argument('file', nargs='+')
+argparser.add_argument('-j', '--jobs', type=int, default=1, help='number of modules and programs to build concurrently')
+argparser.add_argument('-O', dest='optimize', choices=['0', '1', '2', '3'], help='optimization level passed to the c compiler')
+argparser.add_argument('--lto', action='store_true', help='enable link time optimization')
+argparser.add_argument('--cc', default=build.CC, help='c compiler used to build the generated code')
+argparser.add_argument('--pgo', metavar='TRAINING', help='build instrumented, run the TRAINING command and rebuild with the collected profile')
+argparser.add_argument('--separate', action='store_true', help='compile each module to its own object file and link them')
+argparser.add_argument('--pipe', action='store_true', help='pipe the generated c straight to the c compiler without writing it to disk')
+argparser.add_argument('--no-cache', action='store_true', help='do not read or write the parse and build caches')
 
 def main():
     args = argparser.parse_args()
 
-    if filename := args.file:
+    for filename in args.file:
         print(f'compiling `{filename}`')
-        compiler.compile_filename(filename)
-        os.system(f'clang {filename}.c -o {filename}.{EXECUTABLE_SUFIX}')
-        print('done!')
+
+    targets = [(filename, f'{filename}.{EXECUTABLE_SUFIX}') for filename in args.file]
+    builder = build.build_separate if args.separate else build.build_piped if args.pipe else build.build_all
+    cflags = [*build.CFLAGS, *([f'-O{args.optimize}'] if args.optimize else []), *(['-flto'] if args.lto else [])]
+
+    try:
+        if args.pgo:
+            cached = build.build_pgo(targets, shlex.split(args.pgo), jobs=args.jobs, cc=args.cc, cflags=cflags, builder=builder)
+        else:
+            cached = builder(targets, use_cache=not args.no_cache, jobs=args.jobs, cc=args.cc, cflags=cflags)
+    
+    except CalledProcessError as error:
+        print(f'failed to build, `{shlex.join(error.cmd)}` exited with status {error.returncode}')
+        return error.returncode
+
+    for filename, hit in zip(args.file, cached):
+        if hit:
+            print(f'`{filename}` is up to date, reused cached build')
+
+    print('done!')
+
+    for filename in args.file:
         print(f'run with ./{filename}.{EXECUTABLE_SUFIX}')
-        return
 
-    return args.print_help()
+    return
 
 
 if __name__ == '__main__':
-    main()
+    exit(main())
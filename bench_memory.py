@@ -0,0 +1,24 @@
+from sys import argv
+from tracemalloc import start, stop, get_traced_memory
+
+from akita import tokenizer
+from akita import parser
+
+COPIES = 100
+
+fnames = argv[1:] if argv[1:] else ['examples/stubs.py']
+
+for fname in fnames:
+    source = (open(fname).read() + '\n') * COPIES
+
+    start()
+    ast = list(parser.parse(tokenizer.tokenize(source)))
+    current, peak = get_traced_memory()
+    stop()
+
+    print('parsed', fname, 'x', COPIES, '!')
+    print()
+    print('nodes:   ', len(ast))
+    print('resident:', current // 1024, 'KiB')
+    print('peak:    ', peak // 1024, 'KiB')
+    print()
@@ -0,0 +1,27 @@
+from stubs import *
+
+# every iteration builds scratch strings in the arena, the loop releases them
+# before the next one, so memory stays flat however many times it runs
+
+def label(index: int) -> int:
+    name = "item-" + int.__str__(index) + "-" + int.__str__(index * 2)
+    return len(name)
+
+def main() -> int:
+    total = 0
+    i = 0
+
+    while i < 1000000:
+        line = "line " + int.__str__(i) + " of the loop"
+        total += len(line) + label(i)
+        i += 1
+
+    print(total)
+
+    word = persist("arena")
+
+    for c in iter(word):
+        print(c)
+
+    print("")
+    return 0
@@ -0,0 +1,38 @@
+from stubs import *
+
+def main() -> int:
+    ages = {"ana": 31, "bob": 42}
+    ages["cid"] = 7
+    ages["ana"] += 1
+    print(ages["ana"])
+    print(len(ages))
+
+    if "bob" in ages:
+        print("bob is in ages")
+
+    print(ages.get("zed", 0))
+    print(ages.pop("bob"))
+
+    for name in ages:
+        print(name + " is " + int.__str__(ages[name]))
+
+    remainders: dict[int, int] = {}
+    i = 0
+
+    while i < 100000:
+        remainders[i] = i % 1000
+        i += 1
+
+    i = 0
+
+    while i < 100000:
+        remainders.pop(i)
+        i += 2
+
+    print(len(remainders))
+    print(remainders[1999])
+
+    names = {1: "one", 2: "two"}
+    names[3] = "three"
+    print(names[3])
+    return 0
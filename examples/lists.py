@@ -0,0 +1,36 @@
+from stubs import *
+
+def squares(count: int) -> list[int]:
+    result: list[int] = []
+
+    for i in range(count):
+        result.append(i * i)
+
+    return result
+
+def main() -> int:
+    xs = squares(40000)
+    print(len(xs))
+    print(xs[999])
+
+    last = xs.pop()
+    print(last)
+
+    ys = [1, 2, 3]
+    ys.extend(ys)
+    ys[0] = 10
+    print(len(ys))
+    print(ys[0] + ys[3])
+
+    if 3 in ys:
+        print("3 is in ys")
+
+    names: list[str] = []
+
+    for name in ["ana", "bob", "cid"]:
+        names.append(name + "!")
+
+    for name in names:
+        print(name)
+
+    return 0
@@ -0,0 +1,64 @@
+from stubs import *
+
+# g keeps an arena string in a list from outside of it, neither f nor the loop in main
+# may release their region afterwards; prints `12345-kept` twice, then the strings kept
+# through a local bound to the outside list, `0-alias`, `1-alias` and `12345-fill`, and
+# the characters of a walked str kept the same way, `a`, `b` and `c`
+
+def g(xs: list[str]):
+    xs.append(int.__str__(12345) + "-kept")
+
+def f(xs: list[str]) -> int:
+    g(xs)
+    return 0
+
+def fill(xs: list[str]) -> int:
+    ys = xs
+    ys.append(int.__str__(12345) + "-fill")
+    return 0
+
+def main() -> int:
+    xs: list[str] = []
+    f(xs)
+    i = 0
+
+    while i < 3:
+        scratch = int.__str__(99999) + "-scratch"
+        i += 1
+
+    print(xs[0])
+
+    for j in range(2):
+        g(xs)
+
+    scratch = int.__str__(99999) + "-scratch"
+    print(xs[1])
+
+    aliased: list[str] = []
+    i = 0
+
+    while i < 2:
+        ys = aliased
+        ys.append(int.__str__(i) + "-alias")
+        i += 1
+
+    fill(aliased)
+    i = 0
+
+    while i < 3:
+        scratch = int.__str__(99999) + "-scratch"
+        i += 1
+
+    for x in aliased:
+        print(x)
+
+    walked: list[str] = []
+
+    for c in iter("abc"):
+        zs = walked
+        zs.append(c)
+
+    for x in walked:
+        print(x)
+
+    return 0
@@ -5,7 +5,9 @@ from libc import *
 #emit #define _CRT_SECURE_NO_WARNINGS
 
 #emit #include <stdbool.h>
+#emit #include <stdint.h>
 #emit #include <string.h>
+#emit #include <stdarg.h>
 
 #emit #include <malloc.h>
 #emit #include <memory.h>
@@ -15,8 +17,6 @@ from libc import *
 # this are stubs for python interoperability
 
 #emit #define str char*
-#emit #define list__str__ char*
-#emit #define p_list__str__ char*
 #emit #define str_iterator_p str_iterator*
 #emit #define FILE_p FILE*
 
@@ -29,6 +29,130 @@ from libc import *
 #emit }
 #emit str_iterator;
 
+#emit #define void_p void*
+
+# every runtime allocation comes from one bump arena, the compiler marks a region on entry of
+# functions and loop iterations whose results cannot escape and resets to it on the way out;
+# memory that has to outlive its region is taken with malloc (see persist)
+#emit #define AKITA_CHUNK_SIZE (64 * 1024)
+
+#emit typedef struct akita_chunk {
+#emit  struct akita_chunk* next;
+#emit  size_t used;
+#emit  size_t size;
+#emit  _Alignas(16) char data[];
+#emit }
+#emit akita_chunk;
+
+#emit typedef struct akita_arena {
+#emit  akita_chunk* chunk;
+#emit  akita_chunk* spare;
+#emit }
+#emit akita_arena;
+
+#emit typedef struct arena_mark {
+#emit  akita_chunk* chunk;
+#emit  size_t used;
+#emit }
+#emit arena_mark;
+
+#emit #define akita_arena_p akita_arena*
+
+def akita_state() -> akita_arena_p:
+    #emit static akita_arena arena = { NULL, NULL };
+    #emit return &arena;
+    pass
+
+def akita_alloc(size: size_t) -> void_p:
+    #emit akita_arena_p arena = akita_state();
+    #emit akita_chunk* chunk = arena->chunk;
+    #emit size = (size + 15) & ~(size_t) 15;
+    #emit if (chunk == NULL || chunk->size - chunk->used < size)
+    #emit {
+    #emit  akita_chunk** link = &arena->spare;
+    #emit  while (*link != NULL && (*link)->size < size)
+    #emit   link = &(*link)->next;
+    #emit  if ((chunk = *link) != NULL)
+    #emit   *link = chunk->next;
+    #emit  else
+    #emit  {
+    #emit   size_t capacity = size > AKITA_CHUNK_SIZE ? size : AKITA_CHUNK_SIZE;
+    #emit   chunk = malloc(sizeof(akita_chunk) + capacity);
+    #emit   chunk->size = capacity;
+    #emit  }
+    #emit  chunk->used = 0;
+    #emit  chunk->next = arena->chunk;
+    #emit  arena->chunk = chunk;
+    #emit }
+    #emit void_p memory = chunk->data + chunk->used;
+    #emit chunk->used += size;
+    #emit return memory;
+    pass
+
+def akita_mark() -> arena_mark:
+    #emit akita_arena_p arena = akita_state();
+    #emit return (arena_mark) { arena->chunk, arena->chunk != NULL ? arena->chunk->used : 0 };
+    pass
+
+def akita_reset(mark: arena_mark):
+    #emit akita_arena_p arena = akita_state();
+    #emit while (arena->chunk != mark.chunk)
+    #emit {
+    #emit  akita_chunk* chunk = arena->chunk;
+    #emit  arena->chunk = chunk->next;
+    #emit  chunk->next = arena->spare;
+    #emit  arena->spare = chunk;
+    #emit }
+    #emit if (arena->chunk != NULL)
+    #emit  arena->chunk->used = mark.used;
+    pass
+
+# a str points at nul terminated bytes preceded by their length, 4 bytes little-endian,
+# literals get the prefix from the compiler and the runtime builds the rest with str_new
+#emit #define STR_PREFIX 4
+#emit #define str_literal(text) ((str) (text) + STR_PREFIX)
+
+#emit static inline size_t str_length(const char* value)
+#emit {
+#emit  const unsigned char* prefix = (const unsigned char*) value - STR_PREFIX;
+#emit  return (size_t) prefix[0] | (size_t) prefix[1] << 8 | (size_t) prefix[2] << 16 | (size_t) prefix[3] << 24;
+#emit }
+
+#emit static inline str str_set_length(str value, size_t length)
+#emit {
+#emit  unsigned char* prefix = (unsigned char*) value - STR_PREFIX;
+#emit  prefix[0] = length;
+#emit  prefix[1] = length >> 8;
+#emit  prefix[2] = length >> 16;
+#emit  prefix[3] = length >> 24;
+#emit  value[length] = '\0';
+#emit  return value;
+#emit }
+
+#emit static inline str str_new(size_t length)
+#emit {
+#emit  char* buffer = akita_alloc(STR_PREFIX + length +1);
+#emit  return str_set_length(buffer + STR_PREFIX, length);
+#emit }
+
+#emit static inline str str_from(const char* text)
+#emit {
+#emit  size_t length = strlen(text);
+#emit  return memcpy(str_new(length), text, length);
+#emit }
+
+#emit static inline bool str_eq(str left, str right)
+#emit {
+#emit  size_t length = str_length(left);
+#emit  return left == right || (length == str_length(right) && memcmp(left, right, length) == 0);
+#emit }
+
+#emit static inline void str_arguments(int count, str* values)
+#emit {
+#emit  for (int index = 0; index < count; index++)
+#emit   values[index] = str_from(values[index]);
+#emit }
+
 #emit #define ASCII_DEFAULT "\033[0m"
 #emit #define ASCII_RED "\033[31m"
 
@@ -39,20 +163,369 @@ def panic(name: str, message: str):
 def panic(message: str):
     panic("panic", message)
 
+# keys and elements compare with equal_T, dict keys hash with hash_T
+#emit static inline bool equal_int(int left, int right) { return left == right; }
+#emit static inline bool equal_float(float left, float right) { return left == right; }
+#emit static inline bool equal_bool(bool left, bool right) { return left == right; }
+#emit static inline bool equal_char(char left, char right) { return left == right; }
+#emit static inline bool equal_str(str left, str right) { return str_eq(left, right); }
+
+#emit static inline uint32_t hash_int(int key)
+#emit {
+#emit  return (uint32_t) (((uint64_t) (uint32_t) key * 0x9E3779B97F4A7C15ull) >> 32);
+#emit }
+
+#emit static inline uint32_t hash_str(str key)
+#emit {
+#emit  size_t length = str_length(key);
+#emit  uint64_t hash = 0x9E3779B97F4A7C15ull ^ length;
+#emit  uint64_t word = 0;
+#emit  size_t index = 0;
+#emit  for (; index + 8 <= length; index += 8)
+#emit  {
+#emit   memcpy(&word, key + index, 8);
+#emit   hash = (hash ^ word) * 0xFF51AFD7ED558CCDull;
+#emit   hash ^= hash >> 32;
+#emit  }
+#emit  word = 0;
+#emit  memcpy(&word, key + index, length - index);
+#emit  hash = (hash ^ word) * 0xC4CEB9FE1A85EC53ull;
+#emit  return (uint32_t) (hash ^ hash >> 29);
+#emit }
+
+# list[T] is a pointer to a growable buffer, AKITA_LIST monomorphizes it for an element type
+# into list__T__ and its list__T____method functions; buffers live on the heap, not in the arena
+#emit #define AKITA_LIST(T) \
+#emit typedef struct list__##T##__ { T* items; int length; int capacity; }* list__##T##__; \
+#emit static inline list__##T##__ list__##T##____from(int length, T* items) \
+#emit { \
+#emit  list__##T##__ list = malloc(sizeof(*list)); \
+#emit  list->capacity = length > 4 ? length : 4; \
+#emit  list->items = malloc(sizeof(T) * list->capacity); \
+#emit  list->length = length; \
+#emit  if (length > 0) \
+#emit   memcpy(list->items, items, sizeof(T) * length); \
+#emit  return list; \
+#emit } \
+#emit static inline void list__##T##____reserve(list__##T##__ list, int capacity) \
+#emit { \
+#emit  if (capacity <= list->capacity) \
+#emit   return; \
+#emit  list->capacity = list->capacity * 2 > capacity ? list->capacity * 2 : capacity; \
+#emit  list->items = realloc(list->items, sizeof(T) * list->capacity); \
+#emit } \
+#emit static inline void list__##T##____append(list__##T##__ list, T value) \
+#emit { \
+#emit  if (list->length == list->capacity) \
+#emit   list__##T##____reserve(list, list->length +1); \
+#emit  list->items[list->length++] = value; \
+#emit } \
+#emit static inline T list__##T##____pop(list__##T##__ list) \
+#emit { \
+#emit  if (list->length == 0) \
+#emit   panic_str(str_literal("\023\000\000\000" "pop from empty list")); \
+#emit  return list->items[--list->length]; \
+#emit } \
+#emit static inline void list__##T##____extend(list__##T##__ list, list__##T##__ other) \
+#emit { \
+#emit  int length = other->length; \
+#emit  list__##T##____reserve(list, list->length + length); \
+#emit  memcpy(list->items + list->length, other->items, sizeof(T) * length); \
+#emit  list->length += length; \
+#emit } \
+#emit static inline void list__##T##______setitem__(list__##T##__ list, int index, T value) \
+#emit { \
+#emit  list->items[index] = value; \
+#emit } \
+#emit static inline bool list__##T##______contains__(list__##T##__ list, T value) \
+#emit { \
+#emit  for (int index = 0; index < list->length; index++) \
+#emit   if (equal_##T(list->items[index], value)) \
+#emit    return true; \
+#emit  return false; \
+#emit } \
+#emit static inline int len_list__##T##__(list__##T##__ list) \
+#emit { \
+#emit  return list->length; \
+#emit }
+
+#emit AKITA_LIST(int)
+#emit AKITA_LIST(float)
+#emit AKITA_LIST(bool)
+#emit AKITA_LIST(char)
+#emit AKITA_LIST(str)
+
+# dict[K, V] is an open-addressing table with linear probing, AKITA_DICT monomorphizes it into
+# dict__K__V__; every slot keeps the hash of its key, 0 marks an empty slot and 1 a deleted one
+#emit #define DICT_EMPTY 0
+#emit #define DICT_DELETED 1
+#emit #define dict_slot_hash(hash) ((hash) < 2 ? (hash) + 2 : (hash))
+
+#emit #define AKITA_DICT(K, V) \
+#emit typedef struct dict__##K##__##V##__ { uint32_t* hashes; K* keys; V* values; int length; int used; int capacity; }* dict__##K##__##V##__; \
+#emit static inline dict__##K##__##V##__ dict__##K##__##V##____new(int length) \
+#emit { \
+#emit  dict__##K##__##V##__ dict = malloc(sizeof(*dict)); \
+#emit  dict->capacity = 8; \
+#emit  while (dict->capacity * 3 < length * 4) \
+#emit   dict->capacity *= 2; \
+#emit  dict->hashes = calloc(dict->capacity, sizeof(uint32_t)); \
+#emit  dict->keys = malloc(sizeof(K) * dict->capacity); \
+#emit  dict->values = malloc(sizeof(V) * dict->capacity); \
+#emit  dict->length = 0; \
+#emit  dict->used = 0; \
+#emit  return dict; \
+#emit } \
+#emit static inline int dict__##K##__##V##____find(dict__##K##__##V##__ dict, K key, uint32_t hash) \
+#emit { \
+#emit  int mask = dict->capacity - 1; \
+#emit  int index = hash & mask; \
+#emit  int vacant = -1; \
+#emit  while (dict->hashes[index] != DICT_EMPTY) \
+#emit  { \
+#emit   if (dict->hashes[index] == hash && equal_##K(dict->keys[index], key)) \
+#emit    return index; \
+#emit   if (dict->hashes[index] == DICT_DELETED && vacant < 0) \
+#emit    vacant = index; \
+#emit   index = (index +1) & mask; \
+#emit  } \
+#emit  return -1 - (vacant < 0 ? index : vacant); \
+#emit } \
+#emit static inline void dict__##K##__##V##____grow(dict__##K##__##V##__ dict) \
+#emit { \
+#emit  uint32_t* hashes = dict->hashes; \
+#emit  K* keys = dict->keys; \
+#emit  V* values = dict->values; \
+#emit  int capacity = dict->capacity; \
+#emit  if (dict->length * 2 >= capacity) \
+#emit   dict->capacity *= 2; \
+#emit  dict->hashes = calloc(dict->capacity, sizeof(uint32_t)); \
+#emit  dict->keys = malloc(sizeof(K) * dict->capacity); \
+#emit  dict->values = malloc(sizeof(V) * dict->capacity); \
+#emit  dict->used = dict->length; \
+#emit  for (int slot = 0; slot < capacity; slot++) \
+#emit  { \
+#emit   if (hashes[slot] <= DICT_DELETED) \
+#emit    continue; \
+#emit   int index = hashes[slot] & (dict->capacity - 1); \
+#emit   while (dict->hashes[index] != DICT_EMPTY) \
+#emit    index = (index +1) & (dict->capacity - 1); \
+#emit   dict->hashes[index] = hashes[slot]; \
+#emit   dict->keys[index] = keys[slot]; \
+#emit   dict->values[index] = values[slot]; \
+#emit  } \
+#emit  free(hashes); \
+#emit  free(keys); \
+#emit  free(values); \
+#emit } \
+#emit static inline void dict__##K##__##V##______setitem__(dict__##K##__##V##__ dict, K key, V value) \
+#emit { \
+#emit  if ((dict->used +1) * 4 > dict->capacity * 3) \
+#emit   dict__##K##__##V##____grow(dict); \
+#emit  uint32_t hash = dict_slot_hash(hash_##K(key)); \
+#emit  int index = dict__##K##__##V##____find(dict, key, hash); \
+#emit  if (index < 0) \
+#emit  { \
+#emit   index = -1 - index; \
+#emit   dict->used += dict->hashes[index] == DICT_EMPTY; \
+#emit   dict->length++; \
+#emit   dict->hashes[index] = hash; \
+#emit   dict->keys[index] = key; \
+#emit  } \
+#emit  dict->values[index] = value; \
+#emit } \
+#emit static inline dict__##K##__##V##__ dict__##K##__##V##____from(int length, K* keys, V* values) \
+#emit { \
+#emit  dict__##K##__##V##__ dict = dict__##K##__##V##____new(length); \
+#emit  for (int index = 0; index < length; index++) \
+#emit   dict__##K##__##V##______setitem__(dict, keys[index], values[index]); \
+#emit  return dict; \
+#emit } \
+#emit static inline bool dict__##K##__##V##______contains__(dict__##K##__##V##__ dict, K key) \
+#emit { \
+#emit  return dict__##K##__##V##____find(dict, key, dict_slot_hash(hash_##K(key))) >= 0; \
+#emit } \
+#emit static inline V dict__##K##__##V##____getitem(dict__##K##__##V##__ dict, K key) \
+#emit { \
+#emit  int index = dict__##K##__##V##____find(dict, key, dict_slot_hash(hash_##K(key))); \
+#emit  if (index < 0) \
+#emit   panic_str(str_literal("\017\000\000\000" "key not in dict")); \
+#emit  return dict->values[index]; \
+#emit } \
+#emit static inline V dict__##K##__##V##____get(dict__##K##__##V##__ dict, K key, V fallback) \
+#emit { \
+#emit  int index = dict__##K##__##V##____find(dict, key, dict_slot_hash(hash_##K(key))); \
+#emit  return index < 0 ? fallback : dict->values[index]; \
+#emit } \
+#emit static inline V dict__##K##__##V##____pop(dict__##K##__##V##__ dict, K key) \
+#emit { \
+#emit  int index = dict__##K##__##V##____find(dict, key, dict_slot_hash(hash_##K(key))); \
+#emit  if (index < 0) \
+#emit   panic_str(str_literal("\017\000\000\000" "key not in dict")); \
+#emit  dict->hashes[index] = DICT_DELETED; \
+#emit  dict->length--; \
+#emit  return dict->values[index]; \
+#emit } \
+#emit static inline bool dict__##K##__##V##____next(dict__##K##__##V##__ dict, int* index) \
+#emit { \
+#emit  while (*index < dict->capacity && dict->hashes[*index] <= DICT_DELETED) \
+#emit   ++*index; \
+#emit  return *index < dict->capacity; \
+#emit } \
+#emit static inline int len_dict__##K##__##V##__(dict__##K##__##V##__ dict) \
+#emit { \
+#emit  return dict->length; \
+#emit }
+
+#emit AKITA_DICT(int, int)
+#emit AKITA_DICT(int, str)
+#emit AKITA_DICT(str, int)
+#emit AKITA_DICT(str, str)
+
+class list__int__:
+    def append(self: list[int], value: int):
+        ...
+
+    def pop(self: list[int]) -> int:
+        ...
+
+    def extend(self: list[int], other: list[int]):
+        ...
+
+    def __setitem__(self: list[int], index: int, value: int):
+        ...
+
+    def __contains__(self: list[int], value: int) -> bool:
+        ...
+
+class list__float__:
+    def append(self: list[float], value: float):
+        ...
+
+    def pop(self: list[float]) -> float:
+        ...
+
+    def extend(self: list[float], other: list[float]):
+        ...
+
+    def __setitem__(self: list[float], index: int, value: float):
+        ...
+
+    def __contains__(self: list[float], value: float) -> bool:
+        ...
+
+class list__bool__:
+    def append(self: list[bool], value: bool):
+        ...
+
+    def pop(self: list[bool]) -> bool:
+        ...
+
+    def extend(self: list[bool], other: list[bool]):
+        ...
+
+    def __setitem__(self: list[bool], index: int, value: bool):
+        ...
+
+    def __contains__(self: list[bool], value: bool) -> bool:
+        ...
+
+class list__char__:
+    def append(self: list[char], value: char):
+        ...
+
+    def pop(self: list[char]) -> char:
+        ...
+
+    def extend(self: list[char], other: list[char]):
+        ...
+
+    def __setitem__(self: list[char], index: int, value: char):
+        ...
+
+    def __contains__(self: list[char], value: char) -> bool:
+        ...
+
+class list__str__:
+    def append(self: list[str], value: str):
+        ...
+
+    def pop(self: list[str]) -> str:
+        ...
+
+    def extend(self: list[str], other: list[str]):
+        ...
+
+    def __setitem__(self: list[str], index: int, value: str):
+        ...
+
+    def __contains__(self: list[str], value: str) -> bool:
+        ...
+
+class dict__int__int__:
+    def __setitem__(self: dict[int, int], key: int, value: int):
+        ...
+
+    def __contains__(self: dict[int, int], key: int) -> bool:
+        ...
+
+    def get(self: dict[int, int], key: int, fallback: int) -> int:
+        ...
+
+    def pop(self: dict[int, int], key: int) -> int:
+        ...
+
+class dict__int__str__:
+    def __setitem__(self: dict[int, str], key: int, value: str):
+        ...
+
+    def __contains__(self: dict[int, str], key: int) -> bool:
+        ...
+
+    def get(self: dict[int, str], key: int, fallback: str) -> str:
+        ...
+
+    def pop(self: dict[int, str], key: int) -> str:
+        ...
+
+class dict__str__int__:
+    def __setitem__(self: dict[str, int], key: str, value: int):
+        ...
+
+    def __contains__(self: dict[str, int], key: str) -> bool:
+        ...
+
+    def get(self: dict[str, int], key: str, fallback: int) -> int:
+        ...
+
+    def pop(self: dict[str, int], key: str) -> int:
+        ...
+
+class dict__str__str__:
+    def __setitem__(self: dict[str, str], key: str, value: str):
+        ...
+
+    def __contains__(self: dict[str, str], key: str) -> bool:
+        ...
+
+    def get(self: dict[str, str], key: str, fallback: str) -> str:
+        ...
+
+    def pop(self: dict[str, str], key: str) -> str:
+        ...
+
 class char:
     def __str__(value: char) -> str:
-        #emit char* buffer = malloc(2);
+        #emit char* buffer = str_new(1);
         #emit buffer[0] = value;
-        #emit buffer[1] = '\0';
         #emit return buffer;
         pass
 
 class int:
     def __str__(value: int) -> str:
-        #emit char* buffer = malloc(32 +1);
-        #emit sprintf(buffer, "%i", value);
-        #emit buffer = realloc(buffer, strlen(buffer) +1);
-        #emit return buffer;
+        #emit char digits[32 +1];
+        #emit int length = sprintf(digits, "%i", value);
+        #emit return memcpy(str_new(length), digits, length);
         pass
 
 class str_iterator:
@@ -60,7 +533,7 @@ class str_iterator:
         #emit if (self->string[self->position] == '\0')
         #emit {
         #emit  self->stopped = true;
-        #emit  return "x";
+        #emit  return str_new(0);
         #emit }
         #emit char* buffer = char____str__(self->string[self->position++]);
         #emit return buffer;
@@ -68,7 +541,7 @@ class str_iterator:
 
 class str:
     def __iter__(self: str) -> str_iterator_p:
-        #emit str_iterator_p iterator = malloc(sizeof(str_iterator));
+        #emit str_iterator_p iterator = akita_alloc(sizeof(str_iterator));
         #emit *iterator = (str_iterator) { false, self, 0, str_iterator____next__ };
         #emit return iterator;
         pass
@@ -114,41 +587,94 @@ def print(value: bool):
 
 def input(prompt: str) -> str:
     #emit printf("%s", prompt);
-    #emit char* buffer = malloc(4096);
-    #emit fgets(buffer, 1024, stdin);
-    #emit buffer = realloc(buffer, strlen(buffer));
-    #emit return buffer;
+    #emit char line[1024] = "";
+    #emit fgets(line, 1024, stdin);
+    #emit return str_from(line);
     pass
 
 def input(prompt: str) -> int:
     #emit printf("%s", prompt);
-    #emit char* buffer = malloc(4096);
-    #emit fgets(buffer, 1024, stdin);
-    #emit buffer = realloc(buffer, strlen(buffer));
-    #emit return atoi(buffer);
+    #emit char line[1024] = "";
+    #emit fgets(line, 1024, stdin);
+    #emit return atoi(line);
     pass
 
 
 def cat(left: str, right: str) -> str:
-    #emit size_t length = strlen(left) + strlen(right);
-    #emit char* buffer = malloc(length +1);
-    #emit strcpy(buffer, left);
-    #emit strcat(buffer, right);
+    #emit size_t left_length = str_length(left);
+    #emit size_t right_length = str_length(right);
+    #emit char* buffer = str_new(left_length + right_length);
+    #emit memcpy(buffer, left, left_length);
+    #emit memcpy(buffer + left_length, right, right_length);
     #emit return buffer;
     pass
 
-#emit inline
+# chained `+` on str lowers to one cat_n call: lengths are read from the prefix, every piece is copied once
+#emit static str cat_n(int count, ...)
+#emit {
+#emit  va_list pieces;
+#emit  size_t length = 0;
+#emit  va_start(pieces, count);
+#emit  for (int index = 0; index < count; index++)
+#emit   length += str_length(va_arg(pieces, str));
+#emit  va_end(pieces);
+#emit  char* buffer = str_new(length);
+#emit  char* cursor = buffer;
+#emit  va_start(pieces, count);
+#emit  for (int index = 0; index < count; index++)
+#emit  {
+#emit   str piece = va_arg(pieces, str);
+#emit   size_t piece_length = str_length(piece);
+#emit   memcpy(cursor, piece, piece_length);
+#emit   cursor += piece_length;
+#emit  }
+#emit  va_end(pieces);
+#emit  return buffer;
+#emit }
+
+# copies a string out of the arena, for values that have to outlive every region
+def persist(value: str) -> str:
+    #emit size_t size = STR_PREFIX + str_length(value) +1;
+    #emit char* buffer = malloc(size);
+    #emit memcpy(buffer, value - STR_PREFIX, size);
+    #emit return buffer + STR_PREFIX;
+    pass
+
 def range(value: int) -> int:
     return value
 
 #emit #define range(x) x
 
 def len(obj: str) -> int:
-    length = 0
-    for _ in iter(obj):
-        length += 1
-    
-    return length
+    #emit return str_length(obj);
+    pass
+
+def len(obj: list[int]) -> int:
+    ...
+
+def len(obj: list[float]) -> int:
+    ...
+
+def len(obj: list[bool]) -> int:
+    ...
+
+def len(obj: list[char]) -> int:
+    ...
+
+def len(obj: list[str]) -> int:
+    ...
+
+def len(obj: dict[int, int]) -> int:
+    ...
+
+def len(obj: dict[int, str]) -> int:
+    ...
+
+def len(obj: dict[str, int]) -> int:
+    ...
+
+def len(obj: dict[str, str]) -> int:
+    ...
 
 
 def _x_open(path: str, mode: str) -> FILE_p:
@@ -166,11 +692,8 @@ def _x_open(path: str) -> FILE_p:
 
 class FILE:
     def read(stream: FILE_p, count: int) -> str:
-        #emit size_t buffer_len = count;
-        #emit char* buffer = malloc(count +1);
-        #emit fread(buffer, 1, count, stream);
-        #emit buffer[buffer_len] = '\0';
-        #emit return buffer;
+        #emit char* buffer = str_new(count);
+        #emit return str_set_length(buffer, fread(buffer, 1, count, stream));
         pass
 
     def read(stream: FILE_p) -> str:
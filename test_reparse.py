@@ -0,0 +1,58 @@
+from random import Random
+from sys import argv
+
+from akita import parser
+
+fnames = argv[1:] if argv[1:] else ['examples/hello_world.py']
+EDITS = 200
+
+# a random line based edit of the source, as (start, end, text)
+def random_edit(random: Random, source: str) -> tuple[int, int, str]:
+    bounds = [0, *(index +1 for index, char in enumerate(source) if char == '\n')]
+    lines = [source[start:end] for start, end in zip(bounds, bounds[1:] + [len(source)])]
+    start = random.choice(bounds)
+    end = source.find('\n', start)
+    end = len(source) if end < 0 else end +1
+    action = random.choice(('insert', 'delete', 'replace', 'rename'))
+
+    if action == 'insert':
+        return start, start, random.choice(lines)
+    elif action == 'delete':
+        return start, end, ''
+    elif action == 'replace':
+        return start, end, random.choice(lines)
+
+    line = source[start:end]
+    column = random.randrange(len(line) or 1)
+
+    return start + column, start + column, random.choice('abxyz_')
+
+for fname in fnames:
+    print('reparsing', fname, '!')
+    print()
+
+    random = Random(fname)
+    source = open(fname).read()
+    module = parser.parse_module(source)
+    applied = 0
+
+    for _ in range(EDITS):
+        start, end, text = random_edit(random, source)
+        edited = source[:start] + text + source[end:]
+
+        # edits that leave the source malformed are skipped, both parses would reject them
+        try:
+            expected = parser.parse_module(edited)
+        except Exception:
+            continue
+
+        module = parser.reparse(module, start, end, text)
+        source = edited
+        applied += 1
+
+        assert module.source == expected.source, f'source differs after editing {start}:{end}'
+        assert repr(module.nodes) == repr(expected.nodes), f'nodes differ after editing {start}:{end} with {text!r}'
+
+    print(f'{applied} edits matched a full parse')
+    print()
+    print('done reparsing', fname, '!')